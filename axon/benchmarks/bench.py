@@ -0,0 +1,283 @@
+# bench.py
+"""Headless benchmarks for Axon, driven through Textual's `run_test` pilot.
+
+    python benchmarks/bench.py [scenario ...] [--scale 0.5] [--output results.json]
+    python benchmarks/bench.py --compare before.json after.json
+
+Each scenario runs in a fresh interpreter against a synthetic tree, so cold-start costs
+and peak memory belong to it alone. Fixtures are generated once and reused.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+SOURCE_DIR = BENCH_DIR.parent / "src" / "axon"
+sys.path.insert(0, str(BENCH_DIR))
+
+from fixtures import FIXTURES
+
+SCREEN_SIZE = (160, 50)
+# Seconds to wait for any one thing to show up before the scenario is failed.
+TIMEOUT = 60.0
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Milliseconds summary of a list of durations in seconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0}
+    return {
+        "n": len(ordered),
+        "median_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def wait_until(condition: Callable[[], bool], timeout: float = TIMEOUT) -> float:
+    """Polls `condition` while the app keeps running; returns the seconds it took."""
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError("benchmark condition never became true")
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - started
+
+
+class Session:
+    """One Axon app under the pilot, with the readiness checks the scenarios share."""
+
+    def __init__(self, app, pilot, started: float):
+        from metrics import tracer
+        from views import DirectoryBrowser
+
+        self.app = app
+        self.pilot = pilot
+        self.started = started
+        self.tracer = tracer
+        self._browser_type = DirectoryBrowser
+
+    def elapsed(self) -> float:
+        """Seconds since the app was constructed."""
+        return time.perf_counter() - self.started
+
+    def columns_ready(self, path: Path) -> bool:
+        browsers = list(self.app.query(self._browser_type))
+        return bool(browsers) and browsers[-1].path == path and not any(b.scanning for b in browsers)
+
+    async def navigate(self, path: Path) -> float:
+        started = time.perf_counter()
+        self.app.set_current_path(path)
+        await wait_until(lambda: self.columns_ready(path))
+        return time.perf_counter() - started
+
+    async def preview(self, path: Path) -> float:
+        """Seconds from asking for a preview of `path` until its tabs are on screen, debounce included."""
+        await self.settle()
+        shown = self._count("preview.show")
+        started = time.perf_counter()
+        self.app.selected_path = path
+        self.app.update_preview()
+        await wait_until(lambda: self._count("preview.show") > shown)
+        return time.perf_counter() - started
+
+    async def settle(self) -> None:
+        await self.pilot.pause(0.2)
+
+    def _count(self, name: str) -> int:
+        histogram = self.tracer.histograms().get(name)
+        return histogram.count if histogram else 0
+
+    def spans(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {"count": h.count, "mean_ms": h.mean * 1000, "p95_ms": h.percentile(0.95) * 1000}
+            for name, h in sorted(self.tracer.histograms().items())
+        }
+
+
+async def bench_wide(session: Session, root: Path, results: Dict[str, Any]) -> None:
+    cursor = []
+    for _ in range(200):
+        started = time.perf_counter()
+        await session.pilot.press("j")
+        cursor.append(time.perf_counter() - started)
+    results["cursor_latency"] = summarize(cursor)
+    files = sorted(root.glob("file_*.txt"))
+    files = files[::max(1, len(files) // 30)]
+    results["preview_latency"] = summarize([await session.preview(path) for path in files])
+    results["navigate_child"] = summarize([await session.navigate(root / f"dir_{i:02d}") for i in range(10)])
+
+
+async def bench_deep(session: Session, root: Path, results: Dict[str, Any]) -> None:
+    chain = [root]
+    while True:
+        children = sorted(p for p in chain[-1].iterdir() if p.is_dir())
+        if not children:
+            break
+        chain.append(children[0])
+    results["depth"] = len(chain) - 1
+    results["navigate_down"] = summarize([await session.navigate(path) for path in chain[1:]])
+    results["navigate_up"] = summarize([await session.navigate(path) for path in reversed(chain[:-1])])
+    results["navigate_jump"] = summarize([await session.navigate(path) for path in (chain[-1], root) * 5])
+
+
+async def bench_huge_files(session: Session, root: Path, results: Dict[str, Any]) -> None:
+    for name in ("medium.py", "large.py", "log.txt", "blob.bin"):
+        cold = await session.preview(root / name)
+        await session.preview(root / "medium.py" if name != "medium.py" else root / "blob.bin")
+        warm = await session.preview(root / name)
+        results[f"preview_{name}"] = {"cold_ms": cold * 1000, "warm_ms": warm * 1000}
+
+
+async def bench_dirty_repo(session: Session, root: Path, results: Dict[str, Any]) -> None:
+    await wait_until(lambda: session.app.repo is not None)
+    results["git_discovery_ms"] = session.elapsed() * 1000
+    await wait_until(lambda: session.app.path_index is not None and session.app.path_index.ready)
+    results["path_index_ms"] = session.elapsed() * 1000
+    directories = [root / f"pkg_{i:02d}" / f"mod_{i % 7}" for i in range(20)]
+    results["navigate_repo"] = summarize([await session.navigate(path) for path in directories])
+    modified = [root / f"pkg_{i % 50:02d}" / f"mod_{i % 7}" / f"src_{i:05d}.py" for i in range(0, 150, 5)]
+    results["preview_modified"] = summarize([await session.preview(path) for path in modified if path.exists()])
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "wide": bench_wide,
+    "deep": bench_deep,
+    "huge_files": bench_huge_files,
+    "dirty_repo": bench_dirty_repo,
+}
+
+
+async def drive(name: str, root: Path) -> Dict[str, Any]:
+    """Runs one scenario in this process; meant for a fresh interpreter."""
+    results: Dict[str, Any] = {}
+    os.chdir(root)
+    sys.path.insert(0, str(SOURCE_DIR))
+    started = time.perf_counter()
+    from main import Axon
+
+    results["import_ms"] = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    app = Axon()
+    async with app.run_test(size=SCREEN_SIZE) as pilot:
+        session = Session(app, pilot, started)
+        # Measured from constructing the app, so mounting and the first scan are both in it.
+        await wait_until(lambda: session.columns_ready(root))
+        results["time_to_first_column_ms"] = session.elapsed() * 1000
+        await SCENARIOS[name](session, root, results)
+        results["spans"] = session.spans()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KiB elsewhere.
+
+
+def run_child(name: str, root: Path, cache_dir: Path) -> Dict[str, Any]:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as handle:
+        result_file = Path(handle.name)
+    env = dict(os.environ, XDG_CACHE_HOME=str(cache_dir))
+    try:
+        process = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--fixture", str(root), "--result-file", str(result_file)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if process.returncode != 0:
+            return {"error": process.stderr.strip().splitlines()[-1:] or ["exit status %d" % process.returncode]}
+        return json.loads(result_file.read_text())
+    finally:
+        result_file.unlink(missing_ok=True)
+
+
+def axon_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=SOURCE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Every timing and memory figure, keyed by its dotted path."""
+    flat: Dict[str, float] = {}
+    for key, value in results.items():
+        if key == "spans":
+            continue
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and key.endswith(("_ms", "_mb")):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(before_path: Path, after_path: Path) -> str:
+    before = flatten(json.loads(before_path.read_text())["scenarios"])
+    after = flatten(json.loads(after_path.read_text())["scenarios"])
+    lines = [f"{'metric':<48}{'before':>12}{'after':>12}{'change':>10}"]
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        lines.append(f"{key:<48}{old:>12.2f}{new:>12.2f}{change:>10}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies fixture sizes")
+    parser.add_argument("--fixtures", type=Path, default=Path(tempfile.gettempdir()) / "axon-bench", help="where fixtures are kept")
+    parser.add_argument("--output", type=Path, help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--fixture", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare(*args.compare))
+        return 0
+    if args.child:
+        args.result_file.write_text(json.dumps(asyncio.run(drive(args.child, args.fixture))))
+        return 0
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    report: Dict[str, Any] = {
+        "axon_commit": axon_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "scenarios": {},
+    }
+    for name in args.scenarios or list(SCENARIOS):
+        print(f"{name}: preparing fixture…", file=sys.stderr)
+        root = FIXTURES[name](args.fixtures / f"{name}-x{args.scale:g}", args.scale)
+        print(f"{name}: running…", file=sys.stderr)
+        report["scenarios"][name] = run_child(name, root, args.fixtures / "cache")
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# fixtures.py
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict
+
+# Lines of the synthetic source file used to fill huge files; about 64 bytes each.
+SOURCE_LINE = "    value = compute(index, offset) + cache.get(key, default)  # x\n"
+
+
+def _done(root: Path) -> bool:
+    return (root / ".axon-bench-fixture").exists()
+
+
+def _mark_done(root: Path) -> None:
+    (root / ".axon-bench-fixture").touch()
+
+
+def make_wide(root: Path, scale: float = 1.0) -> Path:
+    """One directory holding many files and a few subdirectories."""
+    if _done(root):
+        return root
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(int(20_000 * scale)):
+        (root / f"file_{i:06d}.txt").write_text(f"file {i}\n")
+    for i in range(20):
+        (root / f"dir_{i:02d}").mkdir(exist_ok=True)
+    _mark_done(root)
+    return root
+
+
+def make_deep(root: Path, scale: float = 1.0) -> Path:
+    """A chain of nested directories with a handful of files at every level."""
+    if _done(root):
+        return root
+    directory = root
+    for depth in range(max(2, int(40 * scale))):
+        directory = directory / f"level_{depth:02d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(10):
+            (directory / f"item_{i}.py").write_text(f"depth = {depth}\n")
+    _mark_done(root)
+    return root
+
+
+def make_huge_files(root: Path, scale: float = 1.0) -> Path:
+    """A few large text files, plus a binary one, for the streamed preview."""
+    if _done(root):
+        return root
+    root.mkdir(parents=True, exist_ok=True)
+    chunk = SOURCE_LINE * 16384  # 1 MiB
+    for name, mib in (("medium.py", 8), ("large.py", 64), ("log.txt", 128)):
+        with open(root / name, "w") as f:
+            for _ in range(max(1, int(mib * scale))):
+                f.write(chunk)
+    with open(root / "blob.bin", "wb") as f:
+        f.write(os.urandom(1024 * 1024) * max(1, int(32 * scale)))
+    _mark_done(root)
+    return root
+
+
+def make_dirty_repo(root: Path, scale: float = 1.0) -> Path:
+    """A git repo with many tracked files, many of them modified, and many untracked ones."""
+    if _done(root):
+        return root
+    root.mkdir(parents=True, exist_ok=True)
+    files = int(10_000 * scale)
+    for i in range(files):
+        directory = root / f"pkg_{i % 50:02d}" / f"mod_{i % 7}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"src_{i:05d}.py").write_text("".join(f"line = {n}\n" for n in range(40)))
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+        GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com",
+    )
+    for args in (["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "fixture"]):
+        subprocess.run(["git", *args], cwd=root, env=env, check=True)
+    for i in range(0, files, 5):  # Every fifth file modified...
+        path = root / f"pkg_{i % 50:02d}" / f"mod_{i % 7}" / f"src_{i:05d}.py"
+        with open(path, "a") as f:
+            f.write("changed = True\n")
+    for i in range(files // 5):  # ...and as many untracked ones next to them.
+        (root / f"pkg_{i % 50:02d}" / f"new_{i:05d}.py").write_text("new = True\n")
+    _mark_done(root)
+    return root
+
+
+FIXTURES: Dict[str, Callable[[Path, float], Path]] = {
+    "wide": make_wide,
+    "deep": make_deep,
+    "huge_files": make_huge_files,
+    "dirty_repo": make_dirty_repo,
+}
@@ -0,0 +1,251 @@
+# archives.py
+
+import os
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from listing import DirectoryItem
+
+ZIP_SUFFIXES = (".zip", ".jar", ".war", ".whl", ".apk", ".epub")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz", ".tbz2", ".tar.xz", ".txz")
+# Archives whose member index (and open file handle) is kept at once.
+MAX_OPEN_ARCHIVES = 8
+
+Member = Union[zipfile.ZipInfo, tarfile.TarInfo]
+
+
+def archive_kind(name: str) -> Optional[str]:
+    """"zip" or "tar" for a file name Axon can browse into, going by its suffix."""
+    name = name.lower()
+    if name.endswith(ZIP_SUFFIXES):
+        return "zip"
+    if name.endswith(TAR_SUFFIXES):
+        return "tar"
+    return None
+
+
+def is_archive(path: Path) -> bool:
+    return archive_kind(path.name) is not None and path.is_file()
+
+
+def split_archive_path(path: Path) -> Optional[Tuple[Path, str]]:
+    """(archive file, member path) for a path at or below an archive; the member is "" for the archive itself.
+
+    Only names with an archive suffix are stat'ed, so this is cheap for ordinary paths.
+    """
+    for candidate in (path, *path.parents):
+        if archive_kind(candidate.name) is not None and candidate.is_file():
+            return candidate, "" if candidate == path else path.relative_to(candidate).as_posix()
+    return None
+
+
+def in_archive(path: Path) -> bool:
+    """True for the members of an archive (not for the archive file itself)."""
+    location = split_archive_path(path)
+    return location is not None and location[1] != ""
+
+
+def is_directory(path: Path) -> bool:
+    """Like Path.is_dir, but true for archives and the directories inside them too.
+
+    Never reads an archive, so it is safe on the event loop: a member of an archive that is not
+    indexed yet counts as a directory, and the column scanning it corrects that once it knows.
+    """
+    if path.is_dir():
+        return True
+    location = split_archive_path(path)
+    if location is None:
+        return False
+    archive, member = location
+    if not member:
+        return True
+    index = archive_cache.peek(archive)
+    return index is None or index.is_dir(member)
+
+
+class ArchiveIndex:
+    """The member tree of one zip or tar file, read from its central directory or headers alone.
+
+    Nothing is extracted: member data is decompressed by `read_member` when a preview asks
+    for it, and only as far as it asks. Compressed tarballs have no index of their own, so
+    building theirs decompresses the stream once, in the scanning worker.
+    """
+
+    def __init__(self, path: Path, stamp: Tuple[int, int]):
+        self.path = path
+        self.stamp = stamp
+        # A compressed tarball cannot seek: reaching a member decompresses everything before it.
+        self.compressed_tar = archive_kind(path.name) == "tar" and not path.name.lower().endswith(".tar")
+        self.member_count = 0
+        self.total_size = 0
+        self._handle: Union[zipfile.ZipFile, tarfile.TarFile, None] = None
+        # The handle's file position is shared, so member reads take turns.
+        self._lock = threading.Lock()
+        self._members: Dict[str, Member] = {}
+        # Directory → {name: (is_dir, size, mtime)}; "" is the archive's top level.
+        self._children: Dict[str, Dict[str, Tuple[bool, int, float]]] = {"": {}}
+        self._dir_sizes: Dict[str, int] = {}
+
+    @classmethod
+    def read(cls, path: Path, is_cancelled: Callable[[], bool] = lambda: False) -> Optional["ArchiveIndex"]:
+        """Indexes `path`; None if it is not a readable archive or the read was cancelled."""
+        try:
+            st = path.stat()
+            index = cls(path, (st.st_mtime_ns, st.st_size))
+            if archive_kind(path.name) == "zip":
+                handle = index._handle = zipfile.ZipFile(path)
+                for info in handle.infolist():
+                    index._add(info.filename, info.is_dir(), info.file_size, _zip_mtime(info), info)
+            else:
+                handle = index._handle = tarfile.open(path, "r:*")
+                for info in handle:
+                    if is_cancelled():
+                        index.close()
+                        return None
+                    index._add(info.name, info.isdir(), info.size if info.isfile() else 0, info.mtime, info)
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError):
+            return None
+        return index
+
+    def _add(self, name: str, is_dir: bool, size: int, mtime: float, info: Member) -> None:
+        parts = [part for part in name.split("/") if part not in ("", ".")]
+        if not parts or ".." in parts:
+            return
+        directory = ""
+        # Archives need not list the directories their members live in.
+        for part in parts[:-1]:
+            child = f"{directory}/{part}" if directory else part
+            if child not in self._children:
+                self._children[directory][part] = (True, 0, 0.0)
+                self._children[child] = {}
+            directory = child
+        member = f"{directory}/{parts[-1]}" if directory else parts[-1]
+        if is_dir:
+            self._children[directory][parts[-1]] = (True, 0, mtime)
+            self._children.setdefault(member, {})
+            return
+        self._children[directory][parts[-1]] = (False, size, mtime)
+        self._members[member] = info
+        self.member_count += 1
+        self.total_size += size
+        while directory:
+            self._dir_sizes[directory] = self._dir_sizes.get(directory, 0) + size
+            directory = directory.rpartition("/")[0]
+
+    def is_dir(self, member: str) -> bool:
+        return member in self._children
+
+    def is_file(self, member: str) -> bool:
+        return member in self._members
+
+    def listing(self, member: str) -> List[DirectoryItem]:
+        """The entries of a directory inside the archive, in the order a column shows them."""
+        parent = self.path / member if member else self.path
+        prefix = f"{member}/" if member else ""
+        items = [
+            DirectoryItem(parent, name, is_dir, self._dir_sizes.get(prefix + name, 0) if is_dir else size, mtime)
+            for name, (is_dir, size, mtime) in self._children.get(member, {}).items()
+        ]
+        items.sort(key=lambda item: item.sort_key)
+        return items
+
+    def member_size(self, member: str) -> Tuple[int, Optional[int]]:
+        """(size, compressed size) of a file member; tar members have no compressed size of their own."""
+        info = self._members[member]
+        if isinstance(info, zipfile.ZipInfo):
+            return info.file_size, info.compress_size
+        return info.size, None
+
+    def read_cost(self, member: str) -> int:
+        """Bytes decompressed before a member's data is reached; nonzero only inside compressed tarballs."""
+        info = self._members[member]
+        return info.offset_data if self.compressed_tar and isinstance(info, tarfile.TarInfo) else 0
+
+    def read_member(self, member: str, limit: int) -> bytes:
+        """Up to `limit` bytes from the start of a file member, decompressing no further than that."""
+        info = self._members[member]
+        with self._lock:
+            if isinstance(self._handle, zipfile.ZipFile):
+                with self._handle.open(info) as f:
+                    return f.read(limit)
+            f = self._handle.extractfile(info)
+            return f.read(limit) if f is not None else b""  # Links and devices have no data.
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+
+
+def _zip_mtime(info: zipfile.ZipInfo) -> float:
+    try:
+        return datetime(*info.date_time).timestamp()
+    except (ValueError, OverflowError):
+        return 0.0
+
+
+class ArchiveCache:
+    """Indexes of recently browsed archives, validated against the archive's mtime and size."""
+
+    def __init__(self, max_archives: int = MAX_OPEN_ARCHIVES):
+        self.max_archives = max_archives
+        self._indexes: "OrderedDict[Path, ArchiveIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per archive being read, so columns opening it together share a single read.
+        self._reading: Dict[Path, threading.Lock] = {}
+
+    def peek(self, path: Path) -> Optional[ArchiveIndex]:
+        """The index of `path` if it is cached and current; never reads the archive."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is not None and index.stamp == (st.st_mtime_ns, st.st_size):
+                self._indexes.move_to_end(path)
+                return index
+        return None
+
+    def get(self, path: Path, is_cancelled: Callable[[], bool] = lambda: False) -> Optional[ArchiveIndex]:
+        """The index of `path`, reading it first if it is not cached or the archive has changed."""
+        index = self.peek(path)
+        if index is not None:
+            return index
+        with self._lock:
+            reading = self._reading.setdefault(path, threading.Lock())
+        with reading:
+            index = self.peek(path)
+            if index is not None:
+                return index
+            index = ArchiveIndex.read(path, is_cancelled)
+            if index is not None:
+                self._store(path, index)
+        with self._lock:
+            if self._reading.get(path) is reading:
+                del self._reading[path]
+        return index
+
+    def _store(self, path: Path, index: ArchiveIndex) -> None:
+        with self._lock:
+            stale = self._indexes.pop(path, None)
+            self._indexes[path] = index
+            evicted = [stale] if stale is not None else []
+            while len(self._indexes) > self.max_archives:
+                evicted.append(self._indexes.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            indexes = list(self._indexes.values())
+            self._indexes.clear()
+        for index in indexes:
+            index.close()
+
+
+archive_cache = ArchiveCache()
@@ -0,0 +1,202 @@
+# dirsize.py
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Directory rows buffered before they are written to the cache in one transaction.
+CACHE_FLUSH_ROWS = 1000
+
+
+class DirSizeCache:
+    """What each directory holds directly (file bytes, file count, subdirectory names), in SQLite.
+
+    A row is trusted only while its directory's mtime is unchanged. Adding, removing or
+    renaming an entry bumps the mtime of the directory it lives in, so re-measuring a tree
+    reads only the directories that changed and merely stats the rest. A file that grows in
+    place does not touch its directory's mtime and goes unnoticed until something else does.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self._lock = threading.Lock()
+        self._rows: List[Tuple[str, int, int, int, str]] = []
+        try:
+            if path is None:
+                raise OSError("no cache file")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._create()
+        except (OSError, sqlite3.Error):
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+            self._create()
+
+    def _create(self) -> None:
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, bytes INTEGER, files INTEGER, subdirs TEXT)"
+        )
+
+    def get(self, path: str, mtime_ns: int) -> Optional[Tuple[int, int, List[str]]]:
+        """(file bytes, file count, subdirectory names) directly inside `path`, if still current."""
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT mtime_ns, bytes, files, subdirs FROM dirs WHERE path = ?", (path,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[0] != mtime_ns:
+            return None
+        return row[1], row[2], row[3].split("\0") if row[3] else []
+
+    def put(self, path: str, mtime_ns: int, size: int, files: int, subdirs: List[str]) -> None:
+        with self._lock:
+            self._rows.append((path, mtime_ns, size, files, "\0".join(subdirs)))
+            if len(self._rows) >= CACHE_FLUSH_ROWS:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        try:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            pass  # Another Axon holds the database; these rows are simply measured again next time.
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+
+class DirSizeScan:
+    """One recursive measurement of a directory; its totals grow while the walk runs.
+
+    The walk stays on the root's file system, so mount points below it (/proc, network and
+    FUSE mounts, other disks) are neither counted nor cached.
+    """
+
+    def __init__(self, root: Path, device: int = -1):
+        self.root = root
+        self.device = device
+        self.size = 0
+        self.files = 0
+        self.dirs = 0
+        self.errors = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def _add(self, size: int, files: int, subdirs: int) -> None:
+        with self._lock:
+            self.size += size
+            self.files += files
+            self.dirs += subdirs
+            self._pending += subdirs
+
+
+class DirSizer:
+    """Measures directory trees on a shared thread pool, one scandir per directory.
+
+    The work is mostly waiting on the filesystem, so the pool is wider than the CPU count.
+    """
+
+    def __init__(self, cache: DirSizeCache, workers: Optional[int] = None):
+        self.cache = cache
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="axon-dirsize")
+
+    def scan(self, root: Path) -> DirSizeScan:
+        try:
+            scan = DirSizeScan(root, os.stat(root).st_dev)
+        except OSError:
+            scan = DirSizeScan(root)
+            scan._error()
+            scan._done.set()
+            return scan
+        scan._pending = 1
+        self._pool.submit(self._visit, scan, str(root))
+        return scan
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
+
+    def _visit(self, scan: DirSizeScan, path: str) -> None:
+        try:
+            if not scan.cancelled:
+                self._measure(scan, path)
+        finally:
+            with scan._lock:
+                scan._pending -= 1
+                finished = scan._pending == 0
+            if finished:
+                self.cache.flush()
+                scan._done.set()
+
+    def _measure(self, scan: DirSizeScan, path: str) -> None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            scan._error()
+            return
+        if st.st_dev != scan.device:
+            return  # A mount point listed by a row cached before mounts were skipped.
+        mtime_ns = st.st_mtime_ns
+        cached = self.cache.get(path, mtime_ns)
+        if cached is not None:
+            size, files, subdirs = cached
+        else:
+            size = files = 0
+            subdirs = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                # Every directory in a scan is on the scan's device, so skipping
+                                # mount points here keeps the cached row valid for any scan.
+                                if entry.stat(follow_symlinks=False).st_dev == scan.device:
+                                    subdirs.append(entry.name)
+                                continue
+                            size += entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            scan._error()
+                            continue
+                        files += 1
+            except OSError:
+                scan._error()
+                return
+            self.cache.put(path, mtime_ns, size, files, subdirs)
+        # Count the subdirectories as pending before queueing them, so the scan cannot
+        # look finished while they wait in the pool.
+        scan._add(size, files, len(subdirs))
+        for name in subdirs:
+            self._pool.submit(self._visit, scan, os.path.join(path, name))
@@ -0,0 +1,348 @@
+# fileops.py
+
+import errno
+import os
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from metrics import tracer
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# Below this many files a job works through them on its own thread; the pool only pays off
+# for larger trees, where many unlinks or copies can be in flight in the kernel at once.
+PARALLEL_THRESHOLD = 64
+# Files handed to a pool worker at a time.
+BATCH_SIZE = 32
+
+
+class FileJob:
+    """One delete, copy or move of a set of paths, with progress counters the UI can poll."""
+
+    DELETE, COPY, MOVE = "delete", "copy", "move"
+    VERBS = {DELETE: "Deleting", COPY: "Copying", MOVE: "Moving"}
+
+    def __init__(self, kind: str, sources: Iterable[Path], destination: Optional[Path] = None):
+        self.kind = kind
+        self.sources = list(sources)
+        self.destination = destination
+        self.planning = True
+        self.finished = False
+        self.files_total = 0
+        self.files_done = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.errors: List[Tuple[Path, str]] = []
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def description(self) -> str:
+        target = f"'{self.sources[0].name}'" if len(self.sources) == 1 else f"{len(self.sources)} items"
+        suffix = f" to {self.destination}" if self.destination is not None else ""
+        return f"{self.VERBS[self.kind]} {target}{suffix}"
+
+    def _plan(self, files: int, size: int) -> None:
+        with self._lock:
+            self.files_total += files
+            self.bytes_total += size
+
+    def _advance(self, files: int = 0, size: int = 0) -> None:
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += size
+
+    def _fail(self, path: Path, error: Exception) -> None:
+        message = error.strerror if isinstance(error, OSError) and error.strerror else str(error)
+        with self._lock:
+            self.errors.append((path, message))
+
+
+def walk_tree(root: Path, job: FileJob) -> Tuple[List[Tuple[Path, int]], List[Path]]:
+    """Lists the files (with sizes) and directories under `root`, directories parents-first.
+
+    Symlinks and special files (FIFOs, sockets, devices) are listed as files and never
+    followed or opened, so deleting a tree never reaches outside of it.
+    """
+    files: List[Tuple[Path, int]] = []
+    directories: List[Path] = []
+    try:
+        st = os.lstat(root)
+    except OSError as e:
+        job._fail(root, e)
+        return files, directories
+    if not stat.S_ISDIR(st.st_mode):
+        files.append((root, st.st_size))
+        return files, directories
+    stack = [root]
+    while stack and not job.cancelled:
+        directory = stack.pop()
+        directories.append(directory)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        size = 0 if is_dir else entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        is_dir, size = False, 0
+                    if is_dir:
+                        stack.append(Path(entry.path))
+                    else:
+                        files.append((Path(entry.path), size))
+        except OSError as e:
+            job._fail(directory, e)
+    return files, directories
+
+
+def rename_no_replace(source: Path, target: Path) -> None:
+    """Renames `source` to `target`, raising FileExistsError rather than replacing anything at `target`.
+
+    Files are hard-linked into place and then unlinked, which fails atomically if the target
+    appears in the meantime. Directories, and file systems without hard links, fall back to a
+    checked rename.
+    """
+    if os.path.lexists(target) and not _same_file(source, target):
+        raise FileExistsError(errno.EEXIST, "already exists", str(target))
+    if not stat.S_ISDIR(os.lstat(source).st_mode) and not _same_file(source, target):
+        try:
+            os.link(source, target, follow_symlinks=False)
+        except FileExistsError:
+            raise
+        except (OSError, NotImplementedError):
+            pass  # No hard links here (FAT, some network mounts); rename after the check above.
+        else:
+            os.unlink(source)
+            return
+    os.rename(source, target)
+
+
+def _same_file(source: Path, target: Path) -> bool:
+    """True when `target` is `source` under another spelling, as on case-insensitive file systems."""
+    try:
+        return os.path.samestat(os.lstat(source), os.lstat(target))
+    except OSError:
+        return False
+
+
+class FileOperations:
+    """Runs file jobs in the background, each on its own thread, sharing one worker pool.
+
+    `on_finished` is called from the job's thread once it completes, fails or is cancelled.
+    """
+
+    def __init__(self, on_finished: Callable[[FileJob], None], workers: Optional[int] = None):
+        self.on_finished = on_finished
+        self.workers = workers or min(8, (os.cpu_count() or 1) * 2)
+        self.jobs: List[FileJob] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def delete(self, paths: Iterable[Path]) -> FileJob:
+        return self.submit(FileJob(FileJob.DELETE, paths))
+
+    def copy(self, paths: Iterable[Path], destination: Path) -> FileJob:
+        return self.submit(FileJob(FileJob.COPY, paths, destination))
+
+    def move(self, paths: Iterable[Path], destination: Path) -> FileJob:
+        return self.submit(FileJob(FileJob.MOVE, paths, destination))
+
+    def submit(self, job: FileJob) -> FileJob:
+        with self._lock:
+            self.jobs.append(job)
+        threading.Thread(target=self._run, args=(job,), name=f"axon-{job.kind}", daemon=True).start()
+        return job
+
+    def cancel_all(self) -> int:
+        with self._lock:
+            jobs = list(self.jobs)
+        for job in jobs:
+            job.cancel()
+        return len(jobs)
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="axon-fileops")
+            return self._pool
+
+    def _run(self, job: FileJob) -> None:
+        try:
+            with tracer.span(f"fileops.{job.kind}"):
+                getattr(self, f"_{job.kind}")(job)
+        except Exception as e:
+            job._fail(job.destination or job.sources[0], e)
+        finally:
+            job.finished = True
+            with self._lock:
+                self.jobs.remove(job)
+            self.on_finished(job)
+
+    def _map(self, job: FileJob, function: Callable, items: list) -> None:
+        """Applies `function` to every item, spread over the pool when there are enough of them."""
+        if len(items) < PARALLEL_THRESHOLD or self.workers == 1:
+            self._run_batch(job, function, items)
+            return
+        pool = self._executor()
+        futures = [
+            pool.submit(self._run_batch, job, function, items[start:start + BATCH_SIZE])
+            for start in range(0, len(items), BATCH_SIZE)
+        ]
+        wait(futures)
+
+    @staticmethod
+    def _run_batch(job: FileJob, function: Callable, items: list) -> None:
+        for item in items:
+            if job.cancelled:
+                return
+            function(item)
+
+    def _delete(self, job: FileJob, sources: Optional[List[Path]] = None, count: bool = True) -> None:
+        trees = [walk_tree(source, job) for source in (sources if sources is not None else job.sources)]
+        files = [item for tree_files, _ in trees for item in tree_files]
+        if count:
+            job._plan(len(files), sum(size for _, size in files))
+        job.planning = False
+
+        def unlink(item: Tuple[Path, int]) -> None:
+            path, size = item
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                job._fail(path, e)
+                return
+            if count:
+                job._advance(1, size)
+
+        self._map(job, unlink, files)
+        had_errors = bool(job.errors)
+        for _, directories in trees:
+            for directory in reversed(directories):
+                if job.cancelled:
+                    return
+                try:
+                    os.rmdir(directory)
+                except OSError as e:
+                    # A directory left non-empty by an earlier failure is not worth a second report.
+                    if e.errno != errno.ENOTEMPTY or not had_errors:
+                        job._fail(directory, e)
+
+    def _copy(self, job: FileJob, sources: Optional[List[Path]] = None) -> None:
+        pairs: List[Tuple[Path, Path]] = []
+        directories: List[Tuple[Path, Path]] = []
+        for source in (sources if sources is not None else job.sources):
+            target = job.destination / source.name
+            if os.path.lexists(target):
+                job._fail(target, FileExistsError("already exists"))
+                continue
+            if job.destination.resolve().is_relative_to(source.resolve()):
+                job._fail(source, ValueError("cannot copy a directory into itself"))
+                continue
+            files, tree_directories = walk_tree(source, job)
+            directories.extend((directory, target / directory.relative_to(source)) for directory in tree_directories)
+            pairs.extend((path, target / path.relative_to(source)) for path, _ in files)
+            job._plan(len(files), sum(size for _, size in files))
+        job.planning = False
+        for _, target in directories:
+            if job.cancelled:
+                return
+            try:
+                os.makedirs(target, exist_ok=True)
+            except OSError as e:
+                job._fail(target, e)
+
+        def copy(pair: Tuple[Path, Path]) -> None:
+            source, target = pair
+            try:
+                mode = os.lstat(source).st_mode
+                if stat.S_ISLNK(mode):
+                    os.symlink(os.readlink(source), target)
+                elif stat.S_ISFIFO(mode):
+                    # Recreated, never read: opening a FIFO blocks until something writes to it.
+                    os.mkfifo(target, stat.S_IMODE(mode))
+                elif not stat.S_ISREG(mode):
+                    job._fail(source, OSError(errno.EINVAL, "special file skipped"))
+                    return
+                elif not self._copy_file(job, source, target):
+                    return
+            except OSError as e:
+                job._fail(source, e)
+                return
+            job._advance(files=1)
+
+        self._map(job, copy, pairs)
+        for source, target in reversed(directories):
+            try:
+                shutil.copystat(source, target)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _copy_file(job: FileJob, source: Path, target: Path) -> bool:
+        """Copies one file in chunks, counting bytes as they go; returns False if cancelled.
+
+        The source is opened non-blocking and checked once open, so a FIFO or device swapped in
+        since the walk fails instead of hanging the job.
+        """
+        with open(os.open(source, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0)), "rb") as fsrc:
+            if not stat.S_ISREG(os.fstat(fsrc.fileno()).st_mode):
+                raise OSError(errno.EINVAL, "not a regular file")
+            with open(target, "xb") as fdst:
+                while True:
+                    if job.cancelled:
+                        break
+                    chunk = fsrc.read(COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    fdst.write(chunk)
+                    job._advance(size=len(chunk))
+        if job.cancelled:
+            os.unlink(target)  # Never leave a truncated copy behind.
+            return False
+        shutil.copystat(source, target)
+        return True
+
+    def _move(self, job: FileJob) -> None:
+        """Renames where possible; sources on another filesystem are copied and then deleted."""
+        cross_device: List[Path] = []
+        for source in job.sources:
+            if job.cancelled:
+                return
+            target = job.destination / source.name
+            if os.path.lexists(target):
+                job._fail(target, FileExistsError("already exists"))
+                continue
+            try:
+                os.rename(source, target)
+            except OSError as e:
+                if e.errno == errno.EXDEV:
+                    cross_device.append(source)
+                else:
+                    job._fail(source, e)
+                continue
+            job._plan(1, 0)
+            job._advance(files=1)
+        if not cross_device:
+            job.planning = False
+            return
+        errors = len(job.errors)
+        self._copy(job, cross_device)
+        if not job.cancelled and len(job.errors) == errors:
+            self._delete(job, cross_device, count=False)
@@ -0,0 +1,343 @@
+# finder.py
+
+import heapq
+import operator
+import os
+import re
+import string
+import threading
+from itertools import repeat
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from vcs import MAX_PATHSPECS
+
+if TYPE_CHECKING:
+    import git
+
+# The index is kept shortest-path-first, so the first matches found are the shortest ones,
+# which is where the best fuzzy hits almost always are. Only this many are ranked.
+MAX_CANDIDATES = 2000
+# Bounds the index for trees that are not git repos, such as a home directory.
+MAX_INDEXED_PATHS = 2_000_000
+# Characters with a flag per path saying whether it contains them. A query is first
+# narrowed to the paths that contain all of its characters, by ANDing these flags as big
+# integers; other characters are left to the regex.
+INDEXED_CHARS = string.ascii_lowercase + string.digits + "._-/"
+WORD_BOUNDARIES = "/_-. "
+
+_NONZERO = re.compile(b"[^\x00]")
+
+
+class FuzzyMatch:
+    __slots__ = ("path", "score", "positions")
+
+    def __init__(self, path: str, score: int, positions: List[int]):
+        self.path = path
+        self.score = score
+        self.positions = positions
+
+
+def compile_query(query: str) -> "re.Pattern":
+    """A case-insensitive subsequence pattern, with one group per query character.
+
+    Each character is reached through a negated class rather than a lazy `.*?`, so a path
+    is scanned once, without backtracking, and the groups land on the leftmost match.
+    """
+    parts = []
+    for char in query:
+        variants = "".join(sorted({char.lower(), char.upper()}))
+        escaped = "".join(re.escape(variant) for variant in variants)
+        parts.append(f"[^{escaped}]*([{escaped}])")
+    return re.compile("".join(parts))
+
+
+def score_match(path: str, pattern: "re.Pattern", match: "re.Match") -> FuzzyMatch:
+    """Scores a matched path: consecutive runs, word starts and basename hits rank higher."""
+    base = path.rfind("/") + 1
+    # Prefer the query's placement inside the basename when it fits there.
+    basename_match = pattern.match(path, base)
+    if basename_match is not None:
+        match = basename_match
+    positions = [match.start(group) for group in range(1, pattern.groups + 1)]
+    score = 0
+    previous = -2
+    for position in positions:
+        if position == previous + 1:
+            score += 5
+        if position == 0 or path[position - 1] in WORD_BOUNDARIES:
+            score += 3
+        if position >= base:
+            score += 2
+        previous = position
+    return FuzzyMatch(path, score * 16 - len(path), positions)
+
+
+class FuzzyFilter:
+    """Ranks a fixed list of strings against a query that is typed one keystroke at a time.
+
+    When the query extends the previous one, only the previous hits are re-matched.
+    """
+
+    def __init__(self, items: List[str]):
+        self.items = items
+        self._last_query: Optional[str] = None
+        self._last_hits: List[int] = []
+
+    def rank(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, FuzzyMatch]]:
+        """(item index, match) pairs, best first; an empty query keeps the items in order."""
+        if not query:
+            self._last_query = None
+            return [(index, FuzzyMatch(item, 0, [])) for index, item in enumerate(self.items[:limit])]
+        lowered = query.lower()
+        if self._last_query is not None and lowered.startswith(self._last_query):
+            candidates: Iterable[int] = self._last_hits
+        else:
+            candidates = range(len(self.items))
+        pattern = compile_query(query)
+        hits = []
+        for index in candidates:
+            match = pattern.match(self.items[index])
+            if match is not None:
+                hits.append((index, score_match(self.items[index], pattern, match)))
+        self._last_query = lowered
+        self._last_hits = [index for index, _ in hits]
+        hits.sort(key=lambda hit: -hit[1].score)  # Stable, so ties keep their list order.
+        return hits[:limit]
+
+
+class PathIndex:
+    """Every file below `root`, relative to it, with per-character flags for fast narrowing.
+
+    Inside a git work tree the paths come from `git ls-files`, so .gitignore is honoured;
+    elsewhere the tree is walked. Built once in the background, then patched from the
+    filesystem watcher: additions are appended and removals leave an empty slot behind.
+    Changes too broad to patch rebuild the index on a thread of its own, and the result is
+    swapped in once complete.
+    """
+
+    def __init__(self, root: Path, repo: Optional["git.Repo"] = None):
+        self.root = root
+        self.repo = repo
+        self.ready = False
+        self._lock = threading.Lock()
+        # Changed paths seen while a rebuild runs, replayed onto its result; None when idle.
+        self._rebuild_changes: Optional[List[Path]] = None
+        self._reset()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _reset(self) -> None:
+        self._paths: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._alive = bytearray()
+        self._char_flags: Dict[str, bytearray] = {char: bytearray() for char in INDEXED_CHARS}
+        self._generation = 0
+        # The last exhaustive search, reused while the next query only extends it.
+        self._last_query: Optional[str] = None
+        self._last_candidates: List[int] = []
+
+    def build(self, is_cancelled: Callable[[], bool] = lambda: False) -> None:
+        batch: List[str] = []
+        source = git_files(self.repo) if self.repo else walk_files(self.root, self.root, is_cancelled)
+        for rel_path in source:
+            if is_cancelled():
+                return
+            batch.append(rel_path)
+            if len(batch) >= 10_000:
+                self._add(batch)
+                batch = []
+            if len(self._slots) + len(batch) >= MAX_INDEXED_PATHS:
+                break
+        self._add(batch)
+        with self._lock:
+            paths = sorted(self._slots, key=len)
+            self._reset()
+            self._append(paths)
+        self.ready = True
+
+    def update(self, paths: Iterable[Path]) -> None:
+        """Re-checks changed paths: new files are added and vanished ones (or whole directories) dropped."""
+        paths = list(paths)
+        with self._lock:
+            if self._rebuild_changes is not None:
+                # The rebuild may have listed the tree before these changes.
+                self._rebuild_changes.extend(paths)
+        existing: List[str] = []
+        removed: List[str] = []
+        for path in paths:
+            try:
+                rel_path = path.relative_to(self.root).as_posix()
+            except ValueError:
+                continue
+            if rel_path == "." or rel_path.split("/")[0] == ".git":
+                continue
+            (existing if os.path.lexists(path) else removed).append(rel_path)
+        if removed:
+            with self._lock:
+                for rel_path in removed:
+                    stale = [rel_path] if rel_path in self._slots else [
+                        # A directory went away with everything below it.
+                        p for p in self._slots if p.startswith(rel_path + "/")
+                    ]
+                    for p in stale:
+                        slot = self._slots.pop(p)
+                        self._paths[slot] = ""
+                        self._alive[slot] = 0
+                self._changed()
+        if not existing:
+            return
+        if self.repo:
+            if len(existing) > MAX_PATHSPECS:
+                self._start_rebuild()
+                return
+            added = list(git_files(self.repo, *existing))
+        else:
+            added = []
+            for rel_path in existing:
+                path = self.root / rel_path
+                if path.is_dir() and not path.is_symlink():
+                    added.extend(walk_files(self.root, path))
+                else:
+                    added.append(rel_path)  # walk_files lists what is inside a path, not the path itself.
+        self._add(added)
+
+    def _start_rebuild(self) -> None:
+        with self._lock:
+            if self._rebuild_changes is not None:
+                return  # The running rebuild replays these changes when it finishes.
+            self._rebuild_changes = []
+        threading.Thread(target=self._rebuild, name="axon-path-index", daemon=True).start()
+
+    def _rebuild(self) -> None:
+        """Builds a fresh index off the watcher thread; searches use the current one meanwhile."""
+        changes: List[Path] = []
+        try:
+            fresh = PathIndex(self.root, self.repo)
+            fresh.build()
+            with self._lock:
+                self._paths, self._slots, self._alive, self._char_flags = (
+                    fresh._paths, fresh._slots, fresh._alive, fresh._char_flags
+                )
+                self._changed()
+        finally:
+            with self._lock:
+                changes, self._rebuild_changes = self._rebuild_changes, None
+        if changes:
+            self.update(changes)
+
+    def search(
+        self, query: str, limit: int = 50, is_cancelled: Callable[[], bool] = lambda: False
+    ) -> Optional[List[FuzzyMatch]]:
+        """The `limit` best matches for `query`; None if cancelled midway."""
+        if not query:
+            return []
+        pattern = compile_query(query)
+        lowered = query.lower()
+        with self._lock:
+            paths = self._paths
+            generation = self._generation
+            if self._last_query is not None and lowered.startswith(self._last_query):
+                # Every match for the longer query matched the shorter one.
+                candidates: Iterable[int] = self._last_candidates
+            else:
+                bits = int.from_bytes(self._alive, "little")
+                for char in set(lowered):
+                    flags = self._char_flags.get(char)
+                    if flags is not None:
+                        bits &= int.from_bytes(flags, "little")
+                flags = bits.to_bytes(len(paths), "little")
+                candidates = (match.start() for match in _NONZERO.finditer(flags))
+        hits: List[Tuple[int, "re.Match"]] = []
+        for count, slot in enumerate(candidates):
+            if not count % 4096 and is_cancelled():
+                return None
+            match = pattern.match(paths[slot])
+            if match is not None:
+                hits.append((slot, match))
+                if len(hits) >= MAX_CANDIDATES:
+                    break
+        with self._lock:
+            # Only an exhaustive search over an unchanged index can seed the next one.
+            if len(hits) < MAX_CANDIDATES and generation == self._generation:
+                self._last_query = lowered
+                self._last_candidates = [slot for slot, _ in hits]
+        ranked = (score_match(paths[slot], pattern, match) for slot, match in hits)
+        return heapq.nlargest(limit, ranked, key=lambda match: match.score)
+
+    def _add(self, rel_paths: List[str]) -> None:
+        with self._lock:
+            self._append([p for p in dict.fromkeys(rel_paths) if p not in self._slots])
+
+    def _append(self, rel_paths: List[str]) -> None:
+        if not rel_paths:
+            return
+        lowered = [p.lower() for p in rel_paths]
+        for char, flags in self._char_flags.items():
+            flags.extend(map(operator.contains, lowered, repeat(char)))
+        self._slots.update(zip(rel_paths, range(len(self._paths), len(self._paths) + len(rel_paths))))
+        self._paths.extend(rel_paths)
+        self._alive.extend(repeat(1, len(rel_paths)))
+        self._changed()
+
+    def _changed(self) -> None:
+        self._generation += 1
+        self._last_query = None
+        self._last_candidates = []
+
+
+def git_files(repo: "git.Repo", *pathspec: str) -> Iterator[str]:
+    """Tracked and untracked-but-not-ignored files, relative to the work tree, streamed from `git ls-files`."""
+    from git.exc import GitCommandError
+
+    args = ["-z", "--cached", "--others", "--exclude-standard"]
+    if pathspec:
+        args += ["--", *pathspec]
+    try:
+        process = repo.git.ls_files(*args, as_process=True)
+    except GitCommandError:
+        return
+    pending = b""
+    for chunk in iter(lambda: process.stdout.read(1 << 16), b""):
+        *complete, pending = (pending + chunk).split(b"\0")
+        for raw in complete:
+            yield os.fsdecode(raw)
+    try:
+        process.wait()
+    except GitCommandError:
+        pass
+
+
+def walk_files(root: Path, top: Path, is_cancelled: Callable[[], bool] = lambda: False) -> Iterator[str]:
+    """Files below `top`, relative to `root`, skipping .git directories and never following symlinks.
+
+    Like the directory sizer, it stays on the device of `root` and does not descend into mount points.
+    """
+    root_str = str(root)
+    try:
+        device = os.stat(root).st_dev
+    except OSError:
+        return
+    stack = [str(top)]
+    while stack:
+        if is_cancelled():
+            return
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        yield os.path.relpath(entry.path, root_str).replace(os.sep, "/")
+                        continue
+                    try:
+                        if entry.name != ".git" and entry.stat(follow_symlinks=False).st_dev == device:
+                            stack.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
@@ -0,0 +1,127 @@
+# formats.py
+
+import struct
+from typing import Callable, Dict, Optional, Tuple
+
+# Bytes read from the start of a binary file to recognise and summarise its format.
+HEADER_BYTES = 4096
+
+FormatSummary = Tuple[str, Dict[str, str]]
+
+ELF_TYPES = {0: "none", 1: "relocatable", 2: "executable", 3: "shared object", 4: "core dump"}
+ELF_MACHINES = {
+    0x03: "x86", 0x08: "MIPS", 0x14: "PowerPC", 0x15: "PowerPC 64", 0x16: "S390", 0x28: "ARM",
+    0x2A: "SuperH", 0x32: "IA-64", 0x3E: "x86-64", 0xB7: "AArch64", 0xF3: "RISC-V", 0xF7: "BPF", 0x102: "LoongArch",
+}
+ELF_ABIS = {0: "System V", 3: "Linux", 6: "Solaris", 9: "FreeBSD", 12: "OpenBSD"}
+PNG_COLOR_TYPES = {0: "grayscale", 2: "RGB", 3: "palette", 4: "grayscale + alpha", 6: "RGBA"}
+ZIP_METHODS = {0: "stored", 8: "deflate", 9: "deflate64", 12: "bzip2", 14: "LZMA", 93: "zstd", 95: "xz"}
+SQLITE_ENCODINGS = {1: "UTF-8", 2: "UTF-16le", 3: "UTF-16be"}
+
+# Formats recognised by name only.
+SIGNATURES = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bzip2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"(\xb5/\xfd", "zstd"),
+    (b"7z\xbc\xaf\x27\x1c", "7-Zip"),
+    (b"%PDF-", "PDF"),
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+    (b"\x00asm", "WebAssembly"),
+    (b"MZ", "DOS/Windows executable"),
+    (b"\xcf\xfa\xed\xfe", "Mach-O (64-bit)"),
+    (b"\xce\xfa\xed\xfe", "Mach-O (32-bit)"),
+    (b"\xca\xfe\xba\xbe", "Mach-O universal or Java class"),
+)
+
+
+def sniff_format(head: bytes) -> Optional[FormatSummary]:
+    """(format name, header fields) for the first bytes of a file, or None if not recognised.
+
+    A truncated or malformed header still names the format, with whatever fields parsed.
+    """
+    for magic, name, parse in PARSERS:
+        if head.startswith(magic):
+            try:
+                return name, parse(head)
+            except (struct.error, IndexError):
+                return name, {}
+    for magic, name in SIGNATURES:
+        if head.startswith(magic):
+            return name, {}
+    return None
+
+
+def _elf(head: bytes) -> Dict[str, str]:
+    is_64 = head[4] == 2
+    endian = "<" if head[5] == 1 else ">"
+    e_type, machine, _, entry = struct.unpack_from(endian + ("HHIQ" if is_64 else "HHII"), head, 16)
+    counts = struct.unpack_from(endian + "HHHHHH", head, 52 if is_64 else 40)
+    return {
+        "Class": "64-bit" if is_64 else "32-bit",
+        "Byte order": "little-endian" if endian == "<" else "big-endian",
+        "ABI": ELF_ABIS.get(head[7], str(head[7])),
+        "Type": ELF_TYPES.get(e_type, hex(e_type)),
+        "Machine": ELF_MACHINES.get(machine, hex(machine)),
+        "Entry point": hex(entry),
+        "Program headers": str(counts[2]),
+        "Section headers": str(counts[4]),
+    }
+
+
+def _png(head: bytes) -> Dict[str, str]:
+    if head[12:16] != b"IHDR":
+        return {}
+    width, height, depth, color, _, _, interlace = struct.unpack_from(">IIBBBBB", head, 16)
+    return {
+        "Dimensions": f"{width} × {height}",
+        "Bit depth": str(depth),
+        "Colour type": PNG_COLOR_TYPES.get(color, str(color)),
+        "Interlaced": "Adam7" if interlace else "no",
+    }
+
+
+def _zip(head: bytes) -> Dict[str, str]:
+    _, flags, method, _, _, _, compressed, size, name_length = struct.unpack_from("<HHHHHIIIH", head, 4)
+    fields = {
+        "First member": head[30:30 + name_length].decode("utf-8", errors="replace"),
+        "Compression": ZIP_METHODS.get(method, str(method)),
+        "Encrypted": "yes" if flags & 1 else "no",
+    }
+    if not flags & 8:  # Otherwise the sizes follow the data instead.
+        fields["Member size"] = f"{size:,} bytes ({compressed:,} compressed)"
+    return fields
+
+
+def _sqlite(head: bytes) -> Dict[str, str]:
+    page_size, = struct.unpack_from(">H", head, 16)
+    page_size = 65536 if page_size == 1 else page_size
+    change_counter, pages, _, freelist_pages = struct.unpack_from(">IIII", head, 24)
+    schema_format, = struct.unpack_from(">I", head, 44)
+    encoding, user_version = struct.unpack_from(">II", head, 56)
+    application_id, = struct.unpack_from(">I", head, 68)
+    library_version, = struct.unpack_from(">I", head, 96)
+    major, minor, patch = library_version // 1_000_000, library_version // 1000 % 1000, library_version % 1000
+    return {
+        "Page size": f"{page_size:,} bytes",
+        "Pages": f"{pages:,} ({pages * page_size:,} bytes)",
+        "Free pages": f"{freelist_pages:,}",
+        "Journal": "WAL" if head[18] == 2 else "rollback",
+        "Text encoding": SQLITE_ENCODINGS.get(encoding, str(encoding)),
+        "Schema format": str(schema_format),
+        "User version": str(user_version),
+        "Application ID": hex(application_id),
+        "Changes": f"{change_counter:,}",
+        "Written by": f"SQLite {major}.{minor}.{patch}",
+    }
+
+
+# Formats whose headers are summarised field by field.
+PARSERS: Tuple[Tuple[bytes, str, Callable[[bytes], Dict[str, str]]], ...] = (
+    (b"\x7fELF", "ELF", _elf),
+    (b"\x89PNG\r\n\x1a\n", "PNG image", _png),
+    (b"PK\x03\x04", "ZIP archive", _zip),
+    (b"SQLite format 3\x00", "SQLite database", _sqlite),
+)
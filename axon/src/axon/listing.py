@@ -0,0 +1,218 @@
+# listing.py
+
+import heapq
+import os
+import re
+import stat
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+SCAN_BATCH_SIZE = 1024
+
+_DIGITS = re.compile(r"[0-9]+")
+
+
+def natural_key(name: str) -> str:
+    """A case-insensitive key that orders digit runs by value, so "file2" sorts before "file10".
+
+    Each run is replaced by its length and its digits, which keeps the key a plain string:
+    comparing it costs no more than comparing the name itself.
+    """
+    return _DIGITS.sub(_length_prefixed, name.lower())
+
+
+def _length_prefixed(match: "re.Match") -> str:
+    digits = match.group().lstrip("0") or "0"
+    return f"{len(digits):02d}{digits}"
+
+
+class DirectoryItem:
+    """A file or directory shown in a column.
+
+    Columns can hold hundreds of thousands of these, so it is a slotted record rather than
+    a widget; the owning DirectoryBrowser renders only the rows that are on screen.
+    """
+
+    __slots__ = ("parent", "name", "is_dir", "size", "mtime", "sort_key")
+
+    def __init__(self, parent: Path, name: str, is_dir: bool, size: int = 0, mtime: float = 0.0):
+        self.parent = parent
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        # Directories first, then natural names. Computed once, on the thread that scanned
+        # the entry, since every sort mode falls back on it.
+        self.sort_key: Tuple[bool, str] = (not is_dir, natural_key(name))
+
+    @property
+    def path(self) -> Path:
+        return self.parent / self.name
+
+    @property
+    def is_hidden(self) -> bool:
+        return self.name.startswith('.')
+
+    @property
+    def extension(self) -> str:
+        stem, dot, suffix = self.name.lower().rpartition(".")
+        return suffix if dot and stem else ""
+
+
+class DirectoryListing:
+    """Every entry of one directory, as read by a single scandir pass."""
+
+    def __init__(self, path: Path, mtime_ns: int, entries: List[DirectoryItem]):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.entries = entries
+
+
+def iter_directory_batches(
+    path: Path,
+    batch_size: int = SCAN_BATCH_SIZE,
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> Iterator[List[DirectoryItem]]:
+    """Scans `path` with os.scandir, yielding sorted batches of entries as they are read.
+
+    Entry types come from the cached DirEntry data; the stat for sizes and mtimes runs here,
+    in the caller's worker thread, and never on the event loop.
+    """
+    batch: List[DirectoryItem] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if is_cancelled():
+                    return
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                try:
+                    st = entry.stat()
+                    size, mtime = st.st_size, st.st_mtime
+                except OSError:
+                    size, mtime = 0, 0.0
+                batch.append(DirectoryItem(path, entry.name, is_dir, size, mtime))
+                if len(batch) >= batch_size:
+                    batch.sort(key=lambda item: item.sort_key)
+                    yield batch
+                    batch = []
+    except OSError:
+        pass
+    if batch:
+        batch.sort(key=lambda item: item.sort_key)
+        yield batch
+
+
+def read_listing(path: Path, is_cancelled: Callable[[], bool] = lambda: False) -> DirectoryListing:
+    """Scans `path` in one go; for callers that do not render progressively."""
+    mtime_ns = directory_mtime_ns(path)
+    entries: List[DirectoryItem] = []
+    for batch in iter_directory_batches(path, is_cancelled=is_cancelled):
+        entries = list(heapq.merge(entries, batch, key=attrgetter("sort_key")))
+    return DirectoryListing(path, mtime_ns, entries)
+
+
+class ListingPatch:
+    """Changes to one directory: entries re-read by name (None once removed), or a full rescan."""
+
+    def __init__(
+        self,
+        path: Path,
+        mtime_ns: Optional[int],
+        changed: Optional[Dict[str, Optional[DirectoryItem]]] = None,
+        rescanned: Optional[List[DirectoryItem]] = None,
+    ):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.changed = changed
+        self.rescanned = rescanned
+
+    @property
+    def removed_names(self) -> Set[str]:
+        if self.changed is None:
+            return set()
+        return {name for name, item in self.changed.items() if item is None}
+
+    def apply(self, entries: List[DirectoryItem]) -> List[DirectoryItem]:
+        if self.rescanned is not None:
+            return self.rescanned
+        kept = [entry for entry in entries if entry.name not in self.changed]
+        added = sorted((item for item in self.changed.values() if item is not None), key=attrgetter("sort_key"))
+        return list(heapq.merge(kept, added, key=attrgetter("sort_key")))
+
+
+def build_patch(path: Path, names: Optional[Iterable[str]]) -> ListingPatch:
+    """Re-reads only the named entries of `path`, or the whole directory when `names` is None."""
+    if names is None:
+        listing = read_listing(path)
+        return ListingPatch(path, listing.mtime_ns, rescanned=listing.entries)
+    mtime_ns = directory_mtime_ns(path)
+    changed: Dict[str, Optional[DirectoryItem]] = {}
+    for name in names:
+        entry_path = path / name
+        try:
+            st = entry_path.stat()
+        except OSError:
+            changed[name] = None
+            continue
+        changed[name] = DirectoryItem(path, name, stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime)
+    return ListingPatch(path, mtime_ns, changed=changed)
+
+
+def directory_mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ListingCache:
+    """A bounded LRU of directory listings, validated against the directory's mtime.
+
+    The bound is on the total number of entries held, so one huge directory cannot pin
+    hundreds of small ones in memory. Safe to use from scan workers and the event loop.
+    """
+
+    def __init__(self, max_entries: int = 500_000):
+        self.max_entries = max_entries
+        self._listings: "OrderedDict[Path, DirectoryListing]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> Optional[DirectoryListing]:
+        """Returns the cached listing for `path` if the directory has not changed since."""
+        mtime_ns = directory_mtime_ns(path)
+        with self._lock:
+            listing = self._listings.get(path)
+            if listing is None:
+                return None
+            if listing.mtime_ns != mtime_ns:
+                self._discard(path)
+                return None
+            self._listings.move_to_end(path)
+            return listing
+
+    def put(self, listing: DirectoryListing) -> None:
+        with self._lock:
+            self._discard(listing.path)
+            self._listings[listing.path] = listing
+            self._size += len(listing.entries)
+            while self._size > self.max_entries and len(self._listings) > 1:
+                self._discard(next(iter(self._listings)))
+
+    def invalidate(self, path: Path) -> None:
+        with self._lock:
+            self._discard(path)
+
+    def _discard(self, path: Path) -> None:
+        listing = self._listings.pop(path, None)
+        if listing is not None:
+            self._size -= len(listing.entries)
+
+
+listing_cache = ListingCache()
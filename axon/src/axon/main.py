@@ -1,24 +1,45 @@
 # main.py
 
 import os
-import shutil
+import sys
 from collections import deque
 from pathlib import Path
-from typing import Set
+from typing import Dict, List, Optional, Set, Tuple
 
+from startup import profile
+
+# Installed before anything heavy is imported, so `--profile-startup` sees every import.
+profile.begin(sys.argv)
+
+from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.widgets import Header, Footer
 from textual.containers import Horizontal
+from textual.worker import get_current_worker
 
-from screens import HelpScreen, ConfirmationScreen, InputScreen, BookmarksScreen, CommandPalette
 from views import MillerColumns, PreviewPane, DirectoryBrowser
-from widgets import DirectoryItem
-from utils import get_git_repo
+from widgets import DirectorySummary, JobsBar
+from archives import archive_cache, in_archive, is_directory
+from fileops import FileJob, FileOperations, rename_no_replace
+from finder import PathIndex
+from dirsize import DirSizeCache, DirSizer
+from listing import DirectoryItem, ListingPatch, build_patch, listing_cache
+from metrics import tracer
+from repos import repos
+from search import ContentSearcher
+from sorting import DEFAULT_SORT_MODE, SORT_LABELS, SORT_MODES, SortPreferences
+from utils import get_git_repo, user_cache_dir, user_config_dir
+from vcs import get_status_snapshot, head_sha
+from watcher import FsChanges, FsWatcher
+
+profile.mark("imports done")
 
 class Axon(App):
     CSS_PATH = "style.css"
     TITLE = "Axon v2.0"
+    # Ctrl+P opens Axon's own palette (commands, bookmarks and recent places) instead of Textual's.
+    ENABLE_COMMAND_PALETTE = False
     
     BINDINGS = [
         Binding("q", "quit", "Quit", priority=True),
@@ -27,6 +48,9 @@ class Axon(App):
         Binding("l,right", "nav_forward", "Forward/Child"),
         Binding("backspace", "history_back", "History Back"),
         Binding(".", "toggle_hidden", "Toggle Hidden"),
+        Binding("s", "cycle_sort_mode", "Sort Mode"),
+        Binding("S", "toggle_size_sort", "Sort by Size"),
+        Binding("z", "measure_directory", "Measure Size"),
         Binding("space", "toggle_selection", "Select Item"),
         Binding("b", "show_bookmarks", "Bookmarks"),
         Binding("t", "cycle_theme", "Cycle Theme"),
@@ -34,18 +58,34 @@ class Axon(App):
         Binding("d", "create_directory", "New Dir"),
         Binding("r", "rename_item", "Rename"),
         Binding("x", "delete_item", "Delete"),
+        Binding("y", "copy_items", "Copy"),
+        Binding("m", "move_items", "Move"),
+        Binding("escape", "cancel_operations", "Cancel Ops", show=False),
+        Binding("f", "find_file", "Find File"),
+        Binding("/", "search_contents", "Search"),
         Binding("ctrl+p", "show_command_palette", "Commands"),
+        Binding("M", "show_metrics", "Metrics", show=False),
     ]
 
     def __init__(self):
         super().__init__()
         self.history = deque(maxlen=32)
         self.show_hidden = False
+        self.sort_preferences = SortPreferences(user_config_dir() / "sort_modes.json")
         self.syntax_themes = ["monokai", "solarized-dark", "dracula", "github-dark"]
         self.current_theme_index = 0
         self.bookmarks = {"Home": str(Path.home()), "Projects": str(Path.home() / "Projects")}
         self.repo = None
         self.selected_path: Path | None = None
+        # Line the preview is scrolled to, such as a search match; kept until the selection moves.
+        self.preview_line: Optional[int] = None
+        self.fs_watcher = FsWatcher(self._on_fs_changes)
+        self.file_ops = FileOperations(self._on_job_finished)
+        self.path_index: Optional[PathIndex] = None
+        self._dir_sizer: Optional[DirSizer] = None
+        self._content_searcher: Optional[ContentSearcher] = None
+        self.recent_dirs: deque = deque(maxlen=50)
+        self.recent_files: deque = deque(maxlen=50)
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -53,34 +93,161 @@ class Axon(App):
             # vvv FIX: Compose an empty MillerColumns. It will be populated in on_mount. vvv
             yield MillerColumns(id="miller-columns")
             yield PreviewPane()
+        yield JobsBar(self.file_ops, id="jobs")
         yield Footer()
 
     def on_mount(self) -> None:
         """Called when the app is first mounted."""
         # vvv FIX: This now kicks off the initial render of the MillerColumns. vvv
+        profile.mark("app mounted")
         self.set_current_path(Path(os.getcwd()))
+        self.fs_watcher.start()
+        self.call_after_refresh(profile.mark, "first frame")
+
+    def on_unmount(self) -> None:
+        self.fs_watcher.stop()
+        self.file_ops.shutdown()
+        if self._dir_sizer is not None:
+            self._dir_sizer.shutdown()
+        if self._content_searcher is not None:
+            self._content_searcher.shutdown()
+        repos.close()
+        archive_cache.clear()
+
+    @property
+    def dir_sizer(self) -> DirSizer:
+        """Created on first use, so opening its cache is not part of startup."""
+        if self._dir_sizer is None:
+            self._dir_sizer = DirSizer(DirSizeCache(user_cache_dir() / "dirsizes.sqlite3"))
+        return self._dir_sizer
 
-    def set_current_path(self, path: Path):
+    @property
+    def content_searcher(self) -> ContentSearcher:
+        if self._content_searcher is None:
+            self._content_searcher = ContentSearcher()
+        return self._content_searcher
+
+    def set_current_path(self, path: Path, line: Optional[int] = None):
         resolved_path = path.resolve()
-        if not resolved_path.is_dir():
+        if not is_directory(resolved_path):
             self.selected_path = resolved_path
             resolved_path = resolved_path.parent
         else:
             self.selected_path = None
         
-        self.repo = get_git_repo(resolved_path)
-        self.query_one(MillerColumns).path = resolved_path
+        self.remember(resolved_path)
+        if self.selected_path is not None:
+            self.remember(self.selected_path)
+        miller = self.query_one(MillerColumns)
+        miller.path = resolved_path
+        miller.reveal_selected()
         self.sub_title = str(resolved_path)
+        self.preview_line = line
         self.update_preview()
+        # The columns are drawn with the repo known so far; git is consulted once they are on screen.
+        self.call_after_refresh(self._discover_repo, resolved_path)
+
+    @work(thread=True, exclusive=True, group="git-discovery")
+    def _discover_repo(self, path: Path) -> None:
+        """Finds the work tree around `path` and takes its status snapshot, off the event loop.
+
+        Handles come from the shared registry, so moving within a repo costs no rediscovery.
+        Each column gets the repo of its own directory, which differs above a submodule or
+        nested repo; those are given a snapshot too, so drawing them never runs git.
+        """
+        repo = get_git_repo(path)
+        get_status_snapshot(repo, refresh=True)
+        head_sha(repo)  # Starts the cat-file process here rather than on the event loop.
+        column_repos = {directory: get_git_repo(directory) for directory in path.parents}
+        for column_repo in {r.working_dir: r for r in column_repos.values() if r is not None}.values():
+            get_status_snapshot(column_repo)
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self._repo_discovered, repo, column_repos)
+
+    def _repo_discovered(self, repo, column_repos: Dict[Path, object]) -> None:
+        profile.mark("git discovery done")
+        changed = repo is not self.repo
+        self.repo = repo
+        self.query_one(MillerColumns).repo = repo
+        for browser in self.query(DirectoryBrowser):
+            browser.repo = column_repos.get(browser.path, repo)
+            browser.statuses_changed()
+        if changed:
+            self.update_preview()
+        if repo:
+            # Listing a work tree is one cheap `git ls-files`, so its index is built up front.
+            self._ensure_path_index()
+        if profile.enabled:
+            self.exit()
+
+    def remember(self, path: Path) -> None:
+        """Moves `path` to the front of the recent directories or files offered by the command palette."""
+        recent = self.recent_dirs if is_directory(path) else self.recent_files
+        if path in recent:
+            recent.remove(path)
+        recent.appendleft(path)
+
+    def _ensure_path_index(self) -> PathIndex:
+        """Returns the index of the current work tree (or directory), building it in the background if new."""
+        root = Path(self.repo.working_dir) if self.repo else self.query_one(MillerColumns).path
+        if self.path_index is None or self.path_index.root != root:
+            self.path_index = PathIndex(root, self.repo)
+            self._build_path_index(self.path_index)
+        return self.path_index
+
+    @work(thread=True, exclusive=True, group="path-index")
+    def _build_path_index(self, index: PathIndex) -> None:
+        worker = get_current_worker()
+        index.build(lambda: worker.is_cancelled)
 
     def update_preview(self):
-        self.call_after_refresh(self.query_one(PreviewPane).update_preview, self.selected_path)
+        self.query_one(PreviewPane).update_preview(self.selected_path, self.preview_line)
+
+    def _on_fs_changes(self, changes: FsChanges) -> None:
+        """Runs on the watcher thread: turns raw changes into per-directory patches."""
+        patches: Dict[Path, ListingPatch] = {}
+        changed_paths: List[Path] = []
+        for directory, names in changes.items():
+            listing_cache.invalidate(directory)
+            patches[directory] = build_patch(directory, names)
+            changed_paths.extend([directory] if names is None else (directory / name for name in names))
+        snapshot = get_status_snapshot(self.repo)
+        if snapshot is not None:
+            snapshot.refresh_paths(changed_paths)
+        path_index = self.path_index
+        if path_index is not None and path_index.ready:
+            path_index.update(changed_paths)
+        try:
+            self.call_from_thread(self._apply_fs_patches, patches)
+        except RuntimeError:
+            pass  # The app is shutting down.
+
+    def _apply_fs_patches(self, patches: Dict[Path, ListingPatch]) -> None:
+        millers = self.query(MillerColumns)
+        if not millers:
+            return  # The app is shutting down.
+        miller = millers.first()
+        if miller.path is not None and not is_directory(miller.path):
+            # The directory on screen went away; fall back to the nearest one that still exists.
+            self.set_current_path(next(parent for parent in miller.path.parents if parent.is_dir()))
+            return
+        for browser in self.query(DirectoryBrowser):
+            patch = patches.get(browser.path)
+            if patch is not None:
+                browser.apply_patch(patch)
+            else:
+                browser.statuses_changed()  # Git statuses may have been re-ranked.
+        if self.selected_path is not None and self.selected_path.parent in patches:
+            if not self.selected_path.exists():
+                self.selected_path = None
+            self.update_preview()
 
     # ... The rest of the actions are unchanged and correct ...
     def action_nav_back(self) -> None:
         focused = self.focused
         if isinstance(focused, DirectoryBrowser) and focused.id != "browser-0":
-            prev_browser = self.query(DirectoryBrowser)[self.query(DirectoryBrowser).index(focused) - 1]
+            browsers = list(self.query(DirectoryBrowser))
+            prev_browser = browsers[browsers.index(focused) - 1]
             prev_browser.focus()
         else:
             miller = self.query_one(MillerColumns)
@@ -91,11 +258,12 @@ class Axon(App):
     def action_nav_forward(self) -> None:
         focused = self.focused
         if isinstance(focused, DirectoryBrowser):
+            browsers = list(self.query(DirectoryBrowser))
             try:
-                next_browser = self.query(DirectoryBrowser)[self.query(DirectoryBrowser).index(focused) + 1]
+                next_browser = browsers[browsers.index(focused) + 1]
                 next_browser.focus()
             except IndexError:
-                if focused.highlighted_child and isinstance(focused.highlighted_child, DirectoryItem) and focused.highlighted_child.path.is_dir():
+                if focused.highlighted_child and isinstance(focused.highlighted_child, DirectoryItem) and is_directory(focused.highlighted_child.path):
                      self.set_current_path(focused.highlighted_child.path)
 
 
@@ -105,46 +273,244 @@ class Axon(App):
     def action_toggle_hidden(self) -> None:
         self.show_hidden = not self.show_hidden
         self.notify(f"Show hidden files: {'ON' if self.show_hidden else 'OFF'}")
-        self.set_current_path(self.query_one(MillerColumns).path)
+        for browser in self.query(DirectoryBrowser):
+            browser.apply_filter()
+
+    def action_cycle_sort_mode(self) -> None:
+        directory = self._current_directory()
+        current = self.sort_preferences.get(directory)
+        self._set_sort_mode(directory, SORT_MODES[(SORT_MODES.index(current) + 1) % len(SORT_MODES)])
+
+    def action_toggle_size_sort(self) -> None:
+        directory = self._current_directory()
+        size_sorted = self.sort_preferences.get(directory) == "size"
+        self._set_sort_mode(directory, DEFAULT_SORT_MODE if size_sorted else "size")
+
+    def action_measure_directory(self) -> None:
+        summaries = self.query(DirectorySummary)
+        if summaries:
+            summaries.first().measure()
+        else:
+            self.notify("Highlight a directory to measure it.", severity="warning")
+
+    def _set_sort_mode(self, directory: Path, mode: str) -> None:
+        """Remembers `mode` for `directory` and re-sorts its column from the entries it holds."""
+        self.sort_preferences.set(directory, mode)
+        self.notify(f"Sorting {directory.name or directory} by {SORT_LABELS[mode]}")
+        for browser in self.query(DirectoryBrowser):
+            if browser.path == directory:
+                browser.apply_filter()
 
     def action_toggle_selection(self) -> None:
         focused = self.focused
         if isinstance(focused, DirectoryBrowser) and isinstance(focused.highlighted_child, DirectoryItem):
             focused.toggle_selection(focused.highlighted_child.path)
     
-    def action_delete_item(self) -> None:
-        to_delete: Set[Path] = set()
+    def _target_paths(self) -> List[Path]:
+        """The multi-selection across all columns, or else the highlighted path."""
+        targets: Set[Path] = set()
         for browser in self.query(DirectoryBrowser):
-            to_delete.update(browser.selected_paths)
-        
-        if not to_delete and self.selected_path:
-            to_delete.add(self.selected_path)
+            targets.update(browser.selected_paths)
+        if not targets and self.selected_path:
+            targets.add(self.selected_path)
+        return sorted(targets)
+
+    def _read_only(self, *paths: Path) -> bool:
+        """Warns and returns True if any of `paths` is inside an archive, which Axon only reads."""
+        if any(in_archive(path) for path in paths):
+            self.notify("Archives are read-only.", severity="warning")
+            return True
+        return False
 
-        if not to_delete:
+    def action_delete_item(self) -> None:
+        item_list = self._target_paths()
+        if not item_list:
             self.notify("No file selected for deletion.", severity="warning")
             return
-        
-        item_list = list(to_delete)
+        if self._read_only(*item_list):
+            return
         prompt = f"Delete '{item_list[0].name}'?" if len(item_list) == 1 else f"Delete {len(item_list)} items?"
 
         def on_confirm(confirmed: bool):
             if confirmed:
-                deleted_count = 0
-                for path in item_list:
-                    try:
-                        if path.is_dir(): shutil.rmtree(path)
-                        else: os.remove(path)
-                        deleted_count +=1
-                    except Exception as e:
-                        self.notify(f"Error deleting {path.name}: {e}", severity="error")
-                self.set_current_path(self.query_one(MillerColumns).path)
-                self.notify(f"Deleted {deleted_count} items.")
-        
+                self._start_job(self.file_ops.delete(item_list))
+
+        from screens import ConfirmationScreen
+
         self.push_screen(ConfirmationScreen(prompt), on_confirm)
 
+    def _transfer_items(self, kind: str) -> None:
+        item_list = self._target_paths()
+        if not item_list:
+            self.notify(f"No file selected to {kind}.", severity="warning")
+            return
+        if self._read_only(*item_list):
+            return
+        label = f"'{item_list[0].name}'" if len(item_list) == 1 else f"{len(item_list)} items"
+
+        def on_submit(destination: str):
+            if not destination:
+                return
+            target = Path(destination).expanduser().resolve()
+            if not target.is_dir():
+                self.notify(f"Not a directory: {target}", severity="error")
+                return
+            submit = self.file_ops.copy if kind == FileJob.COPY else self.file_ops.move
+            self._start_job(submit(item_list, target))
+
+        from screens import InputScreen
+
+        self.push_screen(InputScreen(f"{kind.capitalize()} {label} to:", str(self._current_directory())), on_submit)
+
+    def action_copy_items(self) -> None: self._transfer_items(FileJob.COPY)
+    def action_move_items(self) -> None: self._transfer_items(FileJob.MOVE)
+
+    def action_cancel_operations(self) -> None:
+        cancelled = self.file_ops.cancel_all()
+        if cancelled:
+            self.notify(f"Cancelling {cancelled} file operation{'s' if cancelled > 1 else ''}…")
+
+    def _start_job(self, job: FileJob) -> None:
+        self.query_one(JobsBar).track()
+
+    def _on_job_finished(self, job: FileJob) -> None:
+        """Runs on the job's thread."""
+        try:
+            self.call_from_thread(self._job_finished, job)
+        except RuntimeError:
+            pass  # The app is shutting down.
+
+    def _job_finished(self, job: FileJob) -> None:
+        changed: Dict[Path, Set[str]] = {}
+        for source in job.sources:
+            if job.kind != FileJob.COPY:
+                changed.setdefault(source.parent, set()).add(source.name)
+            if job.destination is not None:
+                changed.setdefault(job.destination, set()).add(source.name)
+        for directory, names in changed.items():
+            self.fs_watcher.notify_changed(directory, names)
+        done = f"{job.files_done}/{job.files_total}" if job.cancelled else str(job.files_done)
+        summary = f"{job.description}: {'cancelled' if job.cancelled else 'done'}, {done} files."
+        if not job.errors:
+            self.notify(summary)
+            return
+        lines = [f"{path.name}: {message}" for path, message in job.errors[:5]]
+        if len(job.errors) > 5:
+            lines.append(f"…and {len(job.errors) - 5} more")
+        self.notify("\n".join([f"{summary} {len(job.errors)} errors:"] + lines), severity="error", timeout=10)
+
+    def _current_directory(self) -> Path:
+        focused = self.focused
+        if isinstance(focused, DirectoryBrowser):
+            return focused.path
+        return self.query_one(MillerColumns).path
+
+    def _create_entry(self, prompt: str, is_dir: bool) -> None:
+        directory = self._current_directory()
+
+        def on_submit(name: str):
+            if not name:
+                return
+            path = directory / name
+            if self._read_only(path):
+                return
+            try:
+                if is_dir: path.mkdir()
+                else: path.touch(exist_ok=False)
+            except OSError as e:
+                self.notify(f"Error creating {name}: {e}", severity="error")
+                return
+            self.fs_watcher.notify_changed(directory, [name])
+
+        from screens import InputScreen
+
+        self.push_screen(InputScreen(prompt), on_submit)
+
+    def action_create_file(self) -> None: self._create_entry("New file name:", is_dir=False)
+    def action_create_directory(self) -> None: self._create_entry("New directory name:", is_dir=True)
+
+    def action_rename_item(self) -> None:
+        focused = self.focused
+        target = focused.highlighted_child.path if isinstance(focused, DirectoryBrowser) and focused.highlighted_child else self.selected_path
+        if target is None:
+            self.notify("No file selected for renaming.", severity="warning")
+            return
+        if self._read_only(target):
+            return
+
+        def on_submit(new_name: str):
+            if not new_name or new_name == target.name:
+                return
+            if new_name in (".", "..") or os.sep in new_name or (os.altsep and os.altsep in new_name):
+                self.notify(f"Not a valid name: {new_name}", severity="warning")
+                return
+            try:
+                rename_no_replace(target, target.parent / new_name)
+            except FileExistsError:
+                self.notify(f"{new_name} already exists.", severity="warning")
+                return
+            except OSError as e:
+                self.notify(f"Error renaming {target.name}: {e}", severity="error")
+                return
+            if self.selected_path == target:
+                self.selected_path = target.parent / new_name
+            self.fs_watcher.notify_changed(target.parent, [target.name, new_name])
+
+        from screens import InputScreen
+
+        self.push_screen(InputScreen(f"Rename '{target.name}' to:", target.name), on_submit)
+
+    def action_find_file(self) -> None:
+        from screens import FileFinder
+
+        self.push_screen(FileFinder(self._ensure_path_index()), lambda p: self.set_current_path(Path(p)) if p else None)
+
+    def action_search_contents(self) -> None:
+        from screens import ContentSearchScreen
+
+        def on_match(match: Optional[Tuple[str, int]]):
+            if match:
+                self.set_current_path(Path(match[0]), line=match[1])
+
+        self.push_screen(ContentSearchScreen(self.content_searcher, self._current_directory(), self.repo), on_match)
+
+    def action_show_command_palette(self) -> None:
+        from screens import CommandPalette
+
+        commands = {
+            binding.action: (binding.description, f"key: {binding.key}", getattr(self, f"action_{binding.action}"))
+            for binding in self.BINDINGS
+            if binding.action != "show_command_palette"
+        }
+        places = [(f"bookmark '{name}'", path) for name, path in self.bookmarks.items()]
+        places += [("recent directory", str(path)) for path in self.recent_dirs]
+        places += [("recent file", str(path)) for path in self.recent_files]
+
+        def on_choice(choice: Optional[str]):
+            if not choice:
+                return
+            if choice in commands:
+                commands[choice][2]()
+            else:
+                self.set_current_path(Path(choice))
+
+        self.push_screen(CommandPalette(commands, places), on_choice)
+
     def action_quit(self) -> None: self.exit()
-    def action_show_help(self) -> None: self.push_screen(HelpScreen())
-    def action_show_bookmarks(self) -> None: self.push_screen(BookmarksScreen(self.bookmarks), lambda p: self.set_current_path(Path(p)) if p else None)
+    def action_show_help(self) -> None:
+        from screens import HelpScreen
+
+        self.push_screen(HelpScreen())
+
+    def action_show_metrics(self) -> None:
+        from screens import MetricsScreen
+
+        self.push_screen(MetricsScreen(tracer, user_cache_dir() / "traces"))
+
+    def action_show_bookmarks(self) -> None:
+        from screens import BookmarksScreen
+
+        self.push_screen(BookmarksScreen(self.bookmarks), lambda p: self.set_current_path(Path(p)) if p else None)
     
     def action_cycle_theme(self) -> None:
         self.current_theme_index = (self.current_theme_index + 1) % len(self.syntax_themes)
@@ -155,6 +521,8 @@ class Axon(App):
 def run_app():
     """Main entry point for the runnable script."""
     Axon().run()
+    if profile.enabled:
+        print(profile.finish())
 
 if __name__ == "__main__":
     run_app()
\ No newline at end of file
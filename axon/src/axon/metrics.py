@@ -0,0 +1,175 @@
+# metrics.py
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Tuple
+
+# Bucket i counts durations below 2**i microseconds (and at least half that); the last
+# bucket takes everything slower, from about 4 seconds up.
+HISTOGRAM_BUCKETS = 24
+# Individual spans kept for the exported trace; older ones only live on in the histograms.
+MAX_TRACE_EVENTS = 20_000
+
+
+class Histogram:
+    """Durations of one traced operation, in power-of-two microsecond buckets."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """An upper bound, in seconds, for the given fraction of durations."""
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def copy(self) -> "Histogram":
+        clone = Histogram()
+        clone.count, clone.total, clone.min, clone.max = self.count, self.total, self.min, self.max
+        clone.buckets = list(self.buckets)
+        return clone
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.mean * 1000,
+            "min_ms": self.min * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "buckets_us": {f"<{1 << bucket}": count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class Tracer:
+    """Timings of Axon's hot paths: a histogram per name, plus the latest spans for export.
+
+    Recording is a perf_counter pair and a locked dict update, cheap enough to leave on
+    for code that runs once per drawn row.
+    """
+
+    def __init__(self, max_events: int = MAX_TRACE_EVENTS):
+        self.enabled = True
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        # (name, start, duration, thread id), in the order they finished.
+        self._events: Deque[Tuple[str, float, float, int]] = deque(maxlen=max_events)
+
+    def record(self, name: str, started: float, duration: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(duration)
+            self._events.append((name, started, duration, threading.get_ident()))
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter() - started)
+
+    def traced(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorates a function or coroutine function so every call is recorded under `name`."""
+
+        def decorate(function: Callable) -> Callable:
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await function(*args, **kwargs)
+                    started = time.perf_counter()
+                    try:
+                        return await function(*args, **kwargs)
+                    finally:
+                        self.record(name, started, time.perf_counter() - started)
+
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, started, time.perf_counter() - started)
+
+            return wrapper
+
+        return decorate
+
+    def histograms(self) -> Dict[str, Histogram]:
+        """A consistent copy of every histogram, by name."""
+        with self._lock:
+            return {name: histogram.copy() for name, histogram in self._histograms.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._events.clear()
+
+    def export(self, path: Path) -> Path:
+        """Writes the histograms and recent spans as a Chrome trace (chrome://tracing, Perfetto)."""
+        with self._lock:
+            events: List[Tuple[str, float, float, int]] = list(self._events)
+        pid = os.getpid()
+        trace = {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (started - self.started) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": pid,
+                    "tid": thread,
+                }
+                for name, started, duration, thread in events
+            ],
+            "displayTimeUnit": "ms",
+            "histograms": {name: histogram.as_dict() for name, histogram in sorted(self.histograms().items())},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        return path
+
+
+tracer = Tracer()
+traced = tracer.traced
@@ -0,0 +1,302 @@
+# preview.py
+
+import mmap
+import os
+import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+from rich.console import RenderableType
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+
+from vcs import FileBlame, FileHistory, ParsedDiff
+
+INDEX_CHUNK_SIZE = 8 * 1024 * 1024
+# Longer lines (minified bundles, single-line JSON dumps) are cut off for display.
+MAX_LINE_BYTES = 4096
+
+_NEWLINE = re.compile(b"\n")
+
+
+class LineIndex:
+    """Byte offsets of the line starts in a memory-mapped file.
+
+    The index is built a chunk at a time (normally from a worker thread) so the first
+    screenful can be shown long before a multi-hundred-megabyte file has been scanned.
+    Once a line is indexed, reaching it is a single slice of the mapping.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._offsets = array("Q", [0])
+        self._indexed_bytes = 0
+        self._lock = threading.Lock()
+        self.closed = False
+        # Set while a chunk is scanned outside the lock; the mapping cannot be closed under it.
+        self._indexing = False
+
+    @property
+    def complete(self) -> bool:
+        return self._indexed_bytes >= self.size
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if not self.size else min(1.0, self._indexed_bytes / self.size)
+
+    def _check_size(self) -> int:
+        """The file's size, shrunk if it was truncated since it was mapped.
+
+        Touching a mapped page past the end of the file kills the process with SIGBUS, so the
+        mapping is only scanned or sliced below the size this returns.
+        """
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+        except (OSError, ValueError):
+            size = 0
+        if size < self.size:
+            self.size = size
+        return self.size
+
+    def index_chunk(self, chunk_size: int = INDEX_CHUNK_SIZE) -> bool:
+        """Indexes the next chunk of the file; returns True once the whole file is indexed."""
+        with self._lock:
+            if self.closed or self.complete:
+                return True
+            self._indexing = True
+        start = self._indexed_bytes
+        end = max(start, min(start + chunk_size, self._check_size()))
+        try:
+            offsets = array("Q", (match.end() for match in _NEWLINE.finditer(self._mmap, start, end)))
+        finally:
+            with self._lock:
+                self._indexing = False
+                closed = self.closed
+        if closed:
+            self._release()  # close() was called mid-chunk and left the mapping to us.
+            return True
+        with self._lock:
+            self._offsets.extend(offsets)
+            self._indexed_bytes = end
+        return self.complete
+
+    @property
+    def line_count(self) -> int:
+        """Lines indexed so far; exact once `complete` is set."""
+        with self._lock:
+            count = len(self._offsets)
+            if count > 1 and self._offsets[-1] >= self.size:
+                count -= 1  # A trailing newline does not start another line.
+            return count
+
+    @property
+    def estimated_line_count(self) -> int:
+        if self.complete or not self._indexed_bytes:
+            return self.line_count
+        return max(self.line_count, int(self.line_count * self.size / self._indexed_bytes))
+
+    def lines(self, start: int, count: int) -> List[Optional[str]]:
+        """Decodes up to `count` lines from `start`; lines that are not indexed yet come back as None."""
+        result: List[Optional[str]] = []
+        with self._lock:
+            if self.closed:
+                return [None] * count
+            size = self._check_size()
+            offsets = self._offsets
+            indexed = len(offsets)
+            for line_no in range(start, start + count):
+                if line_no + 1 < indexed:
+                    begin, end = offsets[line_no], offsets[line_no + 1]
+                elif line_no + 1 == indexed and self.complete and offsets[line_no] < size:
+                    begin, end = offsets[line_no], size
+                else:
+                    result.append(None)
+                    continue
+                if begin >= size:
+                    result.append(None)  # Cut off by a truncation.
+                    continue
+                raw = self._mmap[begin:min(end, begin + MAX_LINE_BYTES, size)]
+                result.append(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        return result
+
+    def close(self) -> None:
+        """Closes the mapping, or leaves that to `index_chunk` if it is scanning the mapping right now."""
+        with self._lock:
+            self.closed = True
+            if self._indexing:
+                return
+        self._release()
+
+    def _release(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+class StreamedText:
+    """Stands in for a text file too large to render up front, or one opened at a given line.
+
+    The pane opens a TextPreview for it.
+    """
+
+    def __init__(self, path: Path, theme: str, highlight: bool, line: Optional[int] = None):
+        self.path = path
+        self.theme = theme
+        self.highlight = highlight
+        self.line = line
+
+
+class DirectoryInfo:
+    """Stands in for a directory's metadata panel; the pane shows it with a live recursive size."""
+
+    def __init__(self, path: Path, metadata: Dict[str, Union[str, Text]]):
+        self.path = path
+        self.metadata = metadata
+
+
+class BinaryInfo:
+    """Stands in for a binary file's preview: its metadata, a summary of its header if the
+    format is known, and a hex view the pane maps the file into.
+    """
+
+    def __init__(self, path: Path, metadata: Dict[str, Union[str, Text]], file_format: Optional[Tuple[str, Dict[str, str]]]):
+        self.path = path
+        self.metadata = metadata
+        self.file_format = file_format
+
+
+def metadata_panel(metadata: Dict[str, Union[str, Text]], title: str) -> Panel:
+    table = Table(box=None, expand=True, show_header=False)
+    table.add_column(style="bold cyan")
+    table.add_column()
+    for key, value in metadata.items():
+        table.add_row(key, value)
+    return Panel(table, title=title, border_style="blue")
+
+
+class PreviewContent:
+    """Everything a preview needs, prepared off the event loop."""
+
+    def __init__(
+        self,
+        path: Path,
+        git_status: str,
+        info: Union[RenderableType, StreamedText, DirectoryInfo, BinaryInfo],
+        diff: Union[ParsedDiff, str, None],
+        history: Optional[FileHistory] = None,
+        blame: Optional[FileBlame] = None,
+    ):
+        self.path = path
+        self.git_status = git_status
+        self.info = info
+        self.diff = diff
+        # Read from git only once their tabs are opened.
+        self.history = history
+        self.blame = blame
+
+
+def highlight_text(content: str, filename: str, theme: str) -> Text:
+    """Lexes `content` into a line-numbered Text, so rendering it later costs no highlighting."""
+    from rich.syntax import Syntax
+
+    syntax = Syntax(content, Syntax.guess_lexer(filename, content), theme=theme)
+    lines = syntax.highlight(content).split("\n", allow_blank=True)
+    if len(lines) > 1 and not lines[-1].plain:
+        lines = lines[:-1]  # highlight() ends with a newline of its own.
+    gutter_width = len(str(len(lines)))
+    text = Text(no_wrap=True, overflow="crop", end="")
+    for line_no, line in enumerate(lines, 1):
+        text.append(f"{line_no:>{gutter_width}} ", style="dim")
+        text.append_text(line)
+        text.append("\n")
+    text.rstrip()
+    return text
+
+
+def estimate_size(value: Any) -> int:
+    """A rough byte count for PreviewCache's budget; proportions matter more than exactness."""
+    if isinstance(value, Panel):
+        return 256 + estimate_size(value.renderable)
+    if isinstance(value, Text):
+        return sys.getsizeof(value.plain) + 96 * len(value.spans)
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    if isinstance(value, (ParsedDiff, FileHistory, FileBlame)):
+        return value.size_bytes
+    return 2048  # Metadata tables and other small renderables.
+
+
+class PreviewCache:
+    """A byte-budgeted LRU of rendered preview pieces: highlighted text, metadata tables and diffs.
+
+    Keys carry the file's mtime and size (and the theme, where it matters), so an edited file
+    simply misses and its stale entry ages out.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[Any]:
+        """Looks up `key`; pass count=False for a repeat lookup that should not skew hits/misses."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += count
+                return None
+            self.hits += count
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def resize(self, key: Hashable) -> None:
+        """Re-measures an entry that grew after it was cached (a history or blame read lazily), evicting to stay in budget."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            size = estimate_size(entry[0])
+            self._bytes += size - entry[1]
+            if size > self.max_bytes:
+                del self._entries[key]
+                self._bytes -= size
+                return
+            self._entries[key] = (entry[0], size)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,171 @@
+# repos.py
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import git
+
+# Work trees whose Repo handles (and cat-file processes) are kept open at once.
+MAX_OPEN_REPOS = 16
+# Directories whose work-tree root is remembered, so revisiting them skips the walk up.
+MAX_REMEMBERED_DIRECTORIES = 4096
+
+
+class CatFile:
+    """Object lookups through a repo's long-lived `git cat-file --batch-check` and `--batch` processes.
+
+    GitPython starts each process on first use and keeps it for the life of the handle, but
+    they are not thread safe, so every request holds the lock of the process it talks to.
+    """
+
+    def __init__(self, repo: "git.Repo"):
+        self.repo = repo
+        self._check_lock = threading.Lock()
+        self._batch_lock = threading.Lock()
+
+    def header(self, rev: str) -> Optional[Tuple[str, str, int]]:
+        """(sha, type, size) of the object `rev` names, or None if it does not resolve."""
+        if "\n" in rev:
+            return None  # One request per line; a newline would desynchronise the process.
+        with self._check_lock:
+            try:
+                sha, kind, size = self.repo.git.get_object_header(rev)
+            except ValueError:
+                return None  # "missing" or "ambiguous".
+            except OSError:
+                self._restart()
+                return None
+        return sha.decode("ascii"), kind.decode("ascii"), size
+
+    def resolve(self, rev: str) -> Optional[str]:
+        header = self.header(rev)
+        return header[0] if header else None
+
+    def read(self, rev: str, max_size: Optional[int] = None) -> Optional[bytes]:
+        """The content of a blob, or None if `rev` is not a blob or is larger than `max_size`."""
+        header = self.header(rev)
+        if header is None or header[1] != "blob" or (max_size is not None and header[2] > max_size):
+            return None
+        with self._batch_lock:
+            try:
+                return self.repo.git.get_object_data(header[0])[3]
+            except ValueError:
+                return None
+            except OSError:
+                self._restart()
+                return None
+
+    def _restart(self) -> None:
+        """Drops a dead process; GitPython starts a fresh one on the next request."""
+        self.repo.git.clear_cache()
+
+
+class RepoRegistry:
+    """One Repo handle per work tree, found by walking up to the nearest `.git`.
+
+    The innermost `.git` wins, whether it is a directory or the file a submodule or linked
+    work tree has, so nested repos and submodules get their own handle. Lookups are
+    remembered per directory and checked with a single stat when reused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._repos: "OrderedDict[str, git.Repo]" = OrderedDict()
+        self._cat_files: Dict[str, CatFile] = {}
+        self._roots: "OrderedDict[str, str]" = OrderedDict()
+
+    def find(self, path: Path) -> Optional["git.Repo"]:
+        """The repo whose work tree holds `path` (a file or directory), or None."""
+        root = self._work_tree_root(str(path))
+        if root is None:
+            return None
+        with self._lock:
+            repo = self._repos.get(root)
+            if repo is not None:
+                self._repos.move_to_end(root)
+                return repo
+        return self._open(root)
+
+    def cat_file(self, repo: "git.Repo") -> CatFile:
+        with self._lock:
+            cat_file = self._cat_files.get(repo.working_dir)
+            if cat_file is None or cat_file.repo is not repo:
+                cat_file = self._cat_files[repo.working_dir] = CatFile(repo)
+            return cat_file
+
+    def close(self) -> None:
+        """Closes every handle, ending their git processes."""
+        with self._lock:
+            repos = list(self._repos.values())
+            self._repos.clear()
+            self._cat_files.clear()
+            self._roots.clear()
+        for repo in repos:
+            repo.close()
+
+    def _work_tree_root(self, path: str) -> Optional[str]:
+        visited = []
+        directory = path
+        while True:
+            with self._lock:
+                root = self._roots.get(directory)
+            if root is not None:
+                if os.path.exists(os.path.join(root, ".git")):
+                    break
+                self._forget(root)  # The repo was removed since.
+            elif os.path.lexists(os.path.join(directory, ".git")):
+                root = directory
+                break
+            visited.append(directory)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None  # Not remembered: a `git init` later should still be noticed.
+            directory = parent
+        with self._lock:
+            for directory in visited:
+                self._roots[directory] = root
+            self._roots[root] = root
+            while len(self._roots) > MAX_REMEMBERED_DIRECTORIES:
+                self._roots.popitem(last=False)
+        return root
+
+    def _open(self, root: str) -> Optional["git.Repo"]:
+        # GitPython costs a noticeable slice of startup, so it is imported on first use, off the event loop.
+        import git
+
+        try:
+            repo = git.Repo(root)
+        except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError):
+            return None
+        evicted = []
+        with self._lock:
+            existing = self._repos.get(root)
+            if existing is not None:
+                evicted.append(repo)  # Another thread opened it first.
+                repo = existing
+            else:
+                self._repos[root] = repo
+                while len(self._repos) > MAX_OPEN_REPOS:
+                    old_root, old_repo = self._repos.popitem(last=False)
+                    self._cat_files.pop(old_root, None)
+                    evicted.append(old_repo)
+        for old_repo in evicted:
+            # Anyone still holding an evicted handle keeps working; git restarts on demand.
+            old_repo.git.clear_cache()
+        return repo
+
+    def _forget(self, root: str) -> None:
+        with self._lock:
+            for directory in [d for d, r in self._roots.items() if r == root]:
+                del self._roots[directory]
+            repo = self._repos.pop(root, None)
+            self._cat_files.pop(root, None)
+        if repo is not None:
+            repo.git.clear_cache()
+
+
+repos = RepoRegistry()
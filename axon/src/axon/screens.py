@@ -1,13 +1,23 @@
 # screens.py
 
-from typing import Callable, Dict, Any, Tuple
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 
+from textual import work
 from textual.app import ComposeResult
+from textual.binding import Binding
 from textual.screen import ModalScreen
-from textual.widgets import Static, Button, Input, ListView, ListItem, Label
+from textual.widgets import Static, Button, Input, ListView, ListItem, Label, OptionList
 from textual.containers import Vertical, Horizontal
+from textual.worker import get_current_worker
 from rich.text import Text
 from rich.panel import Panel
+from rich.table import Table
+
+from finder import FuzzyFilter, FuzzyMatch, PathIndex
+from metrics import Tracer
+from search import ContentSearch, ContentSearcher, SearchMatch
 
 class HelpScreen(ModalScreen):
     def compose(self) -> ComposeResult:
@@ -18,7 +28,8 @@ Axon v2.0 - A Miller Column File Navigator
 [bold]Navigation[/]
   [yellow]j / ↓[/]      - Move down
   [yellow]k / ↑[/]      - Move up
-  [yellow]l / →[/]      - Go to child directory / Focus next column
+  [yellow]l / →[/]      - Go to child directory or into a zip/tar archive / Focus next column
+                 (members past the first 64 MB of a compressed tarball are not previewed)
   [yellow]h / ←[/]      - Go to parent directory / Focus previous column
   [yellow]Backspace[/] - Go back in history
   [yellow]g[/]          - Go to top
@@ -30,12 +41,22 @@ Axon v2.0 - A Miller Column File Navigator
   [yellow]d[/]          - Create new directory
   [yellow]r[/]          - Rename selected item
   [yellow]x[/]          - Delete selected item(s)
+  [yellow]y[/]          - Copy selected item(s) to a directory
+  [yellow]m[/]          - Move selected item(s) to a directory
+  [yellow]Esc[/]        - Cancel running file operations
 
 [bold]Application[/]
   [yellow]b[/]          - Show bookmarks
   [yellow].[/]          - Toggle hidden files
+  [yellow]s[/]          - Cycle the column's sort: name, modified, size, extension, git status
+  [yellow]S[/]          - Toggle sorting the column by size (directories measured recursively)
+  [yellow]z[/]          - Measure the highlighted directory's total size (stays on its file system)
   [yellow]t[/]          - Cycle syntax theme
+  [yellow]f[/]          - Jump to file (fuzzy)
+  [yellow]/[/]          - Search file contents below the current directory
+  [yellow]o[/]          - Go to a byte offset in a binary file's hex view
   [yellow]Ctrl+P[/]    - Open command palette
+  [yellow]M[/]          - Toggle the performance metrics overlay
   [yellow]q / Ctrl+C[/] - Quit Axon
         """
         yield Vertical(
@@ -80,21 +101,256 @@ class BookmarksScreen(ModalScreen[str]):
         else:
             self.app.pop_screen()
 
+def patch_list_view(list_view: ListView, rows: List[Text]) -> None:
+    """Shows `rows` in `list_view`, relabelling the items already mounted instead of rebuilding them."""
+    items = list(list_view.children)
+    for item, row in zip(items, rows):
+        item.query_one(Label).update(row)
+    if len(rows) > len(items):
+        list_view.extend(ListItem(Label(row)) for row in rows[len(items):])
+    for item in items[len(rows):]:
+        item.remove()
+    list_view.index = 0 if rows else None
+
+def highlight_match(match: FuzzyMatch, style: str = "") -> Text:
+    text = Text(match.path, style=style, no_wrap=True, overflow="ellipsis")
+    for position in match.positions:
+        text.stylize("bold #ffb86c", position, position + 1)
+    return text
+
 class CommandPalette(ModalScreen[str]):
-    # ... (This class is unchanged and correct) ...
-    def __init__(self, commands: Dict[str, Tuple[str, str, Callable]]) -> None:
+    """Commands, bookmarks and recent places, fuzzy-ranked as you type.
+
+    Dismisses with the command key, or with the path of a chosen place.
+    """
+
+    BINDINGS = [
+        Binding("escape", "close", "Close", show=False),
+        Binding("down", "cursor_down", show=False),
+        Binding("up", "cursor_up", show=False),
+    ]
+
+    def __init__(self, commands: Dict[str, Tuple[str, str, Callable]], places: Iterable[Tuple[str, str]] = (), limit: int = 50) -> None:
         super().__init__()
-        self.commands = commands; self.command_list = [(k, d[0], d[1]) for k, d in commands.items()]
+        self.commands = commands
+        # (value, kind, searchable text), commands first; places are (kind, path) pairs.
+        self.entries = [(k, d[1], d[0]) for k, d in commands.items()]
+        self.entries += [(path, kind, path.replace(str(Path.home()), "~", 1)) for kind, path in places]
+        self.filter = FuzzyFilter([text for _, _, text in self.entries])
+        self.limit = limit
+        self.results: List[Tuple[int, FuzzyMatch]] = []
     def compose(self) -> ComposeResult:
-        yield Vertical(Input(placeholder="Type a command...", id="command-input"), ListView(id="command-list"), id="command-palette")
+        yield Vertical(Input(placeholder="Type a command or place...", id="command-input"), ListView(id="command-list"), id="command-palette")
     def on_mount(self) -> None: self.query_one("#command-input").focus(); self.update_list("")
     def on_input_changed(self, event: Input.Changed) -> None: self.update_list(event.value)
-    def on_list_view_selected(self, event: ListView.Selected) -> None: 
-        if event.item and event.item.id: self.dismiss(event.item.id)
-    def on_input_submitted(self, event: Input.Submitted) -> None:
-        if (children := self.query_one(ListView).children) and children and children[0].id: self.dismiss(children[0].id)
+    def on_list_view_selected(self, event: ListView.Selected) -> None: self._choose(self.query_one(ListView).index)
+    def on_input_submitted(self, event: Input.Submitted) -> None: self._choose(self.query_one(ListView).index)
+    def _choose(self, index: Optional[int]) -> None:
+        if index is not None and index < len(self.results):
+            self.dismiss(self.entries[self.results[index][0]][0])
     def update_list(self, term: str) -> None:
-        lv = self.query_one(ListView); lv.clear(); term = term.lower()
-        for k, l, d in self.command_list:
-            if term in l.lower() or term in d.lower():
-                lv.append(ListItem(Label(Text.assemble((f"{l}", "bold"), (f" - {d}", "dim"))), id=k))
\ No newline at end of file
+        self.results = self.filter.rank(term, self.limit)
+        rows = []
+        for index, match in self.results:
+            value, detail, _ = self.entries[index]
+            style = "bold" if value in self.commands else ""
+            rows.append(Text.assemble(highlight_match(match, style), (f" - {detail}", "dim")))
+        patch_list_view(self.query_one(ListView), rows)
+    def action_cursor_down(self) -> None: self.query_one(ListView).action_cursor_down()
+    def action_cursor_up(self) -> None: self.query_one(ListView).action_cursor_up()
+    def action_close(self) -> None: self.dismiss(None)
+
+class FileFinder(ModalScreen[str]):
+    """Jump to any file below the index root by fuzzy name; searching runs off the event loop."""
+
+    BINDINGS = [
+        Binding("escape", "close", "Close", show=False),
+        Binding("down", "cursor_down", show=False),
+        Binding("up", "cursor_up", show=False),
+    ]
+
+    def __init__(self, index: PathIndex, limit: int = 50) -> None:
+        super().__init__()
+        self.index = index
+        self.limit = limit
+        self.matches: List[FuzzyMatch] = []
+    def compose(self) -> ComposeResult:
+        yield Vertical(
+            Input(placeholder="Jump to file...", id="finder-input"),
+            Label("", id="finder-status"),
+            ListView(id="finder-list"),
+            id="file-finder",
+        )
+    def on_mount(self) -> None:
+        self.query_one(Input).focus()
+        self._poll = self.set_interval(0.5, self._index_progress)
+        self._index_progress()
+    def _index_progress(self) -> None:
+        """While the index is still being built, re-runs the query so new paths show up."""
+        if self.index.ready:
+            self._poll.stop()
+        self._search(self.query_one(Input).value)
+    def on_input_changed(self, event: Input.Changed) -> None: self._search(event.value)
+
+    @work(thread=True, exclusive=True, group="find")
+    def _search(self, query: str) -> None:
+        worker = get_current_worker()
+        matches = self.index.search(query, self.limit, lambda: worker.is_cancelled)
+        if matches is not None and not worker.is_cancelled:
+            self.app.call_from_thread(self._show_matches, matches)
+    def _show_matches(self, matches: List[FuzzyMatch]) -> None:
+        self.matches = matches
+        status = f"{len(self.index):,} files" + ("" if self.index.ready else ", indexing…")
+        self.query_one("#finder-status", Label).update(Text(status, style="dim"))
+        patch_list_view(self.query_one(ListView), [self._highlight(match) for match in matches])
+    @staticmethod
+    def _highlight(match: FuzzyMatch) -> Text:
+        text = highlight_match(match)
+        text.stylize_before("dim", 0, match.path.rfind("/") + 1)
+        return text
+
+    def on_list_view_selected(self, event: ListView.Selected) -> None: self._open(self.query_one(ListView).index)
+    def on_input_submitted(self, event: Input.Submitted) -> None: self._open(self.query_one(ListView).index)
+    def _open(self, index: Optional[int]) -> None:
+        if index is not None and index < len(self.matches):
+            self.dismiss(str(self.index.root / self.matches[index].path))
+    def action_cursor_down(self) -> None: self.query_one(ListView).action_cursor_down()
+    def action_cursor_up(self) -> None: self.query_one(ListView).action_cursor_up()
+    def action_close(self) -> None: self.dismiss(None)
+
+class ContentSearchScreen(ModalScreen[Tuple[str, int]]):
+    """Searches file contents below a directory, listing matches as the pool finds them.
+
+    Dismisses with (path, zero-based line number). Typing cancels the running search at once
+    and starts the new one after a short pause.
+    """
+
+    BINDINGS = [
+        Binding("escape", "close", "Close", show=False),
+        Binding("down", "cursor_down", show=False),
+        Binding("up", "cursor_up", show=False),
+    ]
+
+    def __init__(self, searcher: ContentSearcher, root: Path, repo=None, delay: float = 0.15) -> None:
+        super().__init__()
+        self.searcher = searcher
+        self.root = root
+        self.repo = repo
+        self.delay = delay
+        self.search: Optional[ContentSearch] = None
+        self.shown: List[SearchMatch] = []
+        self._pending_start = None
+    def compose(self) -> ComposeResult:
+        yield Vertical(
+            Input(placeholder=f"Search contents of {self.root}...", id="search-input"),
+            Label("", id="search-status"),
+            OptionList(id="search-results"),
+            id="content-search",
+        )
+    def on_mount(self) -> None:
+        self.query_one(Input).focus()
+        self._poll = self.set_interval(0.1, self._collect, pause=True)
+    def on_unmount(self) -> None:
+        if self.search is not None:
+            self.search.cancel()
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+        if self._pending_start is not None:
+            self._pending_start.stop()
+        self.shown = []
+        self.query_one(OptionList).clear_options()
+        self.query_one("#search-status", Label).update("")
+        if event.value:
+            self._pending_start = self.set_timer(self.delay, lambda: self._start(event.value))
+    def _start(self, query: str) -> None:
+        self.search = self.searcher.search(self.root, query, self.repo)
+        self._poll.resume()
+    def _collect(self) -> None:
+        search = self.search
+        if search is None:
+            self._poll.pause()
+            return
+        done = search.done
+        new = search.matches[len(self.shown):]
+        if new:
+            self.shown.extend(new)
+            self.query_one(OptionList).add_options([self._format(match) for match in new])
+        status = f"{len(self.shown):,} matches in {search.files_searched:,} files"
+        if search.files_skipped:
+            status += f", {search.files_skipped:,} binary or too large skipped"
+        if search.truncated:
+            status += ", stopped at the first matches"
+        elif not done:
+            status += ", searching…"
+        self.query_one("#search-status", Label).update(Text(status, style="dim"))
+        if done:
+            self._poll.pause()
+    @staticmethod
+    def _format(match: SearchMatch) -> Text:
+        text = Text(match.text)
+        for start, end in match.spans:
+            text.stylize("bold #ffb86c", start, end)
+        return Text.assemble((match.path, "#bd93f9"), (f":{match.line_no + 1}", "dim"), "  ", text)
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None: self._open(event.option_index)
+    def on_input_submitted(self, event: Input.Submitted) -> None: self._open(self.query_one(OptionList).highlighted)
+    def _open(self, index: Optional[int]) -> None:
+        if index is not None and index < len(self.shown):
+            match = self.shown[index]
+            self.dismiss((str(self.root / match.path), match.line_no))
+    def action_cursor_down(self) -> None: self.query_one(OptionList).action_cursor_down()
+    def action_cursor_up(self) -> None: self.query_one(OptionList).action_cursor_up()
+    def action_close(self) -> None: self.dismiss(None)
+
+class MetricsScreen(ModalScreen):
+    """Live timings of the traced hot paths, slowest in total first."""
+
+    BINDINGS = [
+        Binding("escape,M", "close", "Close", show=False),
+        Binding("r", "reset", "Reset"),
+        Binding("e", "export", "Export"),
+    ]
+
+    def __init__(self, tracer: Tracer, export_dir: Path) -> None:
+        super().__init__()
+        self.tracer = tracer
+        self.export_dir = export_dir
+    def compose(self) -> ComposeResult:
+        yield Vertical(
+            Static(id="metrics-table"),
+            Label(Text("r reset · e export JSON trace · M/esc close", style="dim")),
+            id="metrics-dialog",
+        )
+    def on_mount(self) -> None:
+        self.set_interval(0.5, self._show_metrics)
+        self._show_metrics()
+    def _show_metrics(self) -> None:
+        histograms = self.tracer.histograms()
+        table = Table(box=None, expand=True)
+        table.add_column("Operation", style="bold cyan")
+        for column in ("Count", "Total ms", "Mean ms", "p50 ms", "p95 ms", "Max ms"):
+            table.add_column(column, justify="right")
+        for name, histogram in sorted(histograms.items(), key=lambda item: -item[1].total):
+            table.add_row(
+                name,
+                f"{histogram.count:,}",
+                f"{histogram.total * 1000:,.1f}",
+                f"{histogram.mean * 1000:.2f}",
+                f"{histogram.percentile(0.5) * 1000:.2f}",
+                f"{histogram.percentile(0.95) * 1000:.2f}",
+                f"{histogram.max * 1000:.2f}",
+            )
+        body = table if histograms else Text("Nothing recorded yet.", style="dim")
+        self.query_one("#metrics-table", Static).update(Panel(body, title="Performance", border_style="green"))
+    def action_reset(self) -> None:
+        self.tracer.reset()
+        self._show_metrics()
+    def action_export(self) -> None:
+        try:
+            path = self.tracer.export(self.export_dir / f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        except OSError as e:
+            self.app.notify(f"Could not write trace: {e}", severity="error")
+            return
+        self.app.notify(f"Trace written to {path}")
+    def action_close(self) -> None: self.dismiss(None)
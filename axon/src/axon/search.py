@@ -0,0 +1,249 @@
+# search.py
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from finder import git_files, walk_files
+from utils import SNIFF_BYTES, TEXT_EXTENSIONS, looks_like_text
+
+if TYPE_CHECKING:
+    import git
+
+# A search stops once it has found this many matching lines.
+MAX_MATCHES = 2000
+MAX_MATCHES_PER_FILE = 100
+# Larger files are skipped.
+MAX_FILE_SIZE = 64 * 1024 * 1024
+# Bytes read from a file at a time.
+SEARCH_CHUNK_SIZE = 1024 * 1024
+# An unfinished line is carried into the next chunk until it is this long.
+MAX_CARRY = 4 * 1024 * 1024
+# Characters of a matching line kept for display, centred on the first match when cut.
+MAX_EXCERPT = 240
+# Files handed to a pool worker at a time.
+BATCH_SIZE = 32
+
+Span = Tuple[int, int]
+
+
+class SearchMatch:
+    __slots__ = ("path", "line_no", "text", "spans")
+
+    def __init__(self, path: str, line_no: int, text: str, spans: List[Span]):
+        self.path = path  # Relative to the search root.
+        self.line_no = line_no  # Zero-based.
+        self.text = text
+        self.spans = spans
+
+
+def compile_search(query: str) -> Tuple["re.Pattern", "re.Pattern"]:
+    """Byte and text patterns for a literal, smart-case query.
+
+    The search is case-insensitive unless the query has an uppercase letter. Files are
+    scanned with the byte pattern, so the case folding there is ASCII only.
+    """
+    flags = 0 if any(char.isupper() for char in query) else re.IGNORECASE
+    escaped = re.escape(query)
+    return re.compile(escaped.encode("utf-8"), flags), re.compile(escaped, flags)
+
+
+def search_file(path: str, byte_pattern: "re.Pattern", text_pattern: "re.Pattern") -> Optional[List[Tuple[int, str, List[Span]]]]:
+    """(line number, excerpt, match spans) for each matching line; None if the file was skipped.
+
+    The file is read a chunk at a time and searched up to the last whole line, with the rest
+    carried into the next chunk, so a worker holds about one chunk however large the file is.
+    Plain reads also stay safe when a file is truncated mid-search, where a mapping would fault.
+    """
+    hits: List[Tuple[int, str, List[Span]]] = []
+    line_no = 0
+    carry = b""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > MAX_FILE_SIZE:
+                return None
+            chunk = f.read(SEARCH_CHUNK_SIZE)
+            if os.path.splitext(path)[1].lower() not in TEXT_EXTENSIONS and not looks_like_text(chunk[:SNIFF_BYTES]):
+                return None
+            while len(hits) < MAX_MATCHES_PER_FILE:
+                if not chunk:
+                    _matching_lines(carry, line_no, byte_pattern, text_pattern, hits)
+                    break
+                data = carry + chunk
+                cut = data.rfind(b"\n") + 1
+                if cut == 0 and len(data) < MAX_CARRY:
+                    carry = data  # No line end yet; keep reading.
+                else:
+                    cut = cut or len(data)  # A line longer than MAX_CARRY is searched in pieces.
+                    line_no = _matching_lines(data[:cut], line_no, byte_pattern, text_pattern, hits)
+                    carry = data[cut:]
+                chunk = f.read(SEARCH_CHUNK_SIZE)
+    except OSError:
+        return None
+    return hits[:MAX_MATCHES_PER_FILE]
+
+
+def _matching_lines(
+    block: bytes, line_no: int, byte_pattern: "re.Pattern", text_pattern: "re.Pattern", hits: List[Tuple[int, str, List[Span]]]
+) -> int:
+    """Adds the matching lines of `block`, whose first line is `line_no`; returns the line number it ends on."""
+    counted = 0
+    line_end = -1
+    for match in byte_pattern.finditer(block):
+        if match.start() <= line_end:
+            continue  # Another match on a line already reported.
+        line_start = block.rfind(b"\n", 0, match.start()) + 1
+        line_no += block.count(b"\n", counted, line_start)
+        counted = line_start
+        line_end = block.find(b"\n", match.start())
+        if line_end == -1:
+            line_end = len(block)
+        if hits and hits[-1][0] == line_no:
+            continue  # The rest of an overlong line that already matched.
+        line = block[line_start:line_end].decode("utf-8", "replace").rstrip("\r")
+        hits.append((line_no, *_excerpt(line, [m.span() for m in text_pattern.finditer(line)])))
+        if len(hits) >= MAX_MATCHES_PER_FILE:
+            break
+    return line_no + block.count(b"\n", counted)
+
+
+def _excerpt(line: str, spans: List[Span]) -> Tuple[str, List[Span]]:
+    """Strips the indentation and cuts long lines around the first match, shifting the spans along."""
+    start = len(line) - len(line.lstrip())
+    if len(line) - start > MAX_EXCERPT and spans:
+        start = max(start, spans[0][0] - MAX_EXCERPT // 4)
+    text = line[start:start + MAX_EXCERPT]
+    shifted = [(max(0, a - start), min(len(text), b - start)) for a, b in spans if b > start and a < start + len(text)]
+    return text, shifted
+
+
+def _is_ignored(repo: "git.Repo", rel_path: str) -> bool:
+    from git.exc import GitCommandError
+
+    try:
+        repo.git.check_ignore("-q", rel_path)
+    except GitCommandError:
+        return False  # Exit status 1: not ignored.
+    return True
+
+
+class ContentSearch:
+    """One query over a tree; its matches grow while the pool works through the files."""
+
+    def __init__(self, root: Path, query: str):
+        self.root = root
+        self.query = query
+        self.matches: List[SearchMatch] = []  # Only ever appended to, so readers can slice it.
+        self.files_searched = 0
+        self.files_skipped = 0
+        self.truncated = False
+        self._pending = 1  # The file listing itself, until it has been fully handed out.
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _finish_task(self, searched: int = 0, skipped: int = 0, matches: Optional[List[SearchMatch]] = None) -> None:
+        with self._lock:
+            self.files_searched += searched
+            self.files_skipped += skipped
+            if matches:
+                room = MAX_MATCHES - len(self.matches)
+                if len(matches) >= room:
+                    self.truncated = True
+                    self._cancelled.set()
+                self.matches.extend(matches[:room])
+            self._pending -= 1
+            if self._pending == 0:
+                self._done.set()
+
+
+class ContentSearcher:
+    """Greps trees on a shared thread pool, one batch of files per task.
+
+    Inside a git work tree the files come from `git ls-files`, so .gitignore is honoured;
+    elsewhere the tree is walked. Binaries are skipped with the preview's own sniffing.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or min(16, (os.cpu_count() or 1) * 2)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="axon-search")
+
+    def search(self, root: Path, query: str, repo: Optional["git.Repo"] = None) -> ContentSearch:
+        search = ContentSearch(root, query)
+        threading.Thread(target=self._list_files, args=(search, repo), name="axon-search-files", daemon=True).start()
+        return search
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _list_files(self, search: ContentSearch, repo: Optional["git.Repo"]) -> None:
+        try:
+            patterns = compile_search(search.query)
+            batch: List[str] = []
+            for rel_path in self._files(search, repo):
+                if search.cancelled:
+                    return
+                batch.append(rel_path)
+                if len(batch) >= BATCH_SIZE:
+                    self._submit(search, batch, patterns)
+                    batch = []
+            if batch and not search.cancelled:
+                self._submit(search, batch, patterns)
+        finally:
+            search._finish_task()
+
+    @staticmethod
+    def _files(search: ContentSearch, repo: Optional["git.Repo"]):
+        """Files below the search root, relative to it."""
+        if repo is not None:
+            try:
+                rel_dir = search.root.relative_to(repo.working_dir).as_posix()
+            except ValueError:
+                rel_dir = None
+            if rel_dir == ".":
+                return git_files(repo)
+            # A directory the repo ignores as a whole is searched like any other tree.
+            if rel_dir is not None and not _is_ignored(repo, rel_dir):
+                prefix = len(rel_dir) + 1
+                return (rel_path[prefix:] for rel_path in git_files(repo, rel_dir))
+        return walk_files(search.root, search.root, lambda: search.cancelled)
+
+    def _submit(self, search: ContentSearch, batch: List[str], patterns: Tuple["re.Pattern", "re.Pattern"]) -> None:
+        with search._lock:
+            search._pending += 1
+        self._pool.submit(self._search_batch, search, batch, patterns)
+
+    @staticmethod
+    def _search_batch(search: ContentSearch, batch: List[str], patterns: Tuple["re.Pattern", "re.Pattern"]) -> None:
+        matches: List[SearchMatch] = []
+        searched = skipped = 0
+        try:
+            root = str(search.root)
+            for rel_path in batch:
+                if search.cancelled:
+                    return
+                hits = search_file(os.path.join(root, rel_path), *patterns)
+                if hits is None:
+                    skipped += 1
+                    continue
+                searched += 1
+                matches.extend(SearchMatch(rel_path, line_no, text, spans) for line_no, text, spans in hits)
+        finally:
+            search._finish_task(searched, skipped, matches)
@@ -0,0 +1,115 @@
+# sorting.py
+
+import json
+import os
+from operator import attrgetter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from listing import DirectoryItem
+from vcs import STATUS_PRIORITY
+
+SORT_MODES = ("name", "mtime", "size", "extension", "git")
+SORT_LABELS = {
+    "name": "name",
+    "mtime": "last modified",
+    "size": "size",
+    "extension": "extension",
+    "git": "git status",
+}
+DEFAULT_SORT_MODE = "name"
+# Directories remembered with a non-default mode; the least recently changed are forgotten.
+MAX_REMEMBERED_DIRECTORIES = 1000
+
+
+def entry_key(
+    mode: str,
+    size_of: Callable[[DirectoryItem], int] = attrgetter("size"),
+    statuses: Optional[Dict[str, str]] = None,
+) -> Callable[[DirectoryItem], tuple]:
+    """The sort key for `mode`: directories first, ties broken by natural name order."""
+    if mode == "mtime":
+        return lambda entry: (entry.sort_key[0], -entry.mtime, entry.sort_key[1])
+    if mode == "size":
+        return lambda entry: (entry.sort_key[0], -size_of(entry), entry.sort_key[1])
+    if mode == "extension":
+        return lambda entry: (entry.sort_key[0], entry.extension, entry.sort_key[1])
+    if mode == "git":
+        statuses = statuses or {}
+        return lambda entry: (entry.sort_key[0], -STATUS_PRIORITY.get(statuses.get(entry.name, ""), 0), entry.sort_key[1])
+    return attrgetter("sort_key")
+
+
+def sort_entries(
+    entries: List[DirectoryItem],
+    mode: str,
+    size_of: Callable[[DirectoryItem], int] = attrgetter("size"),
+    statuses: Optional[Dict[str, str]] = None,
+) -> List[DirectoryItem]:
+    """Orders a listing for `mode`, directories first, without touching the disk.
+
+    Every key is built from what the scan already recorded, so switching modes only
+    re-sorts the entries in memory. Ties keep the natural name order.
+    """
+    if mode not in SORT_MODES or mode == "name":
+        return entries  # Listings are kept in name order already.
+    return sorted(entries, key=entry_key(mode, size_of, statuses))
+
+
+def merge_sorted(
+    entries: List[DirectoryItem], added: List[DirectoryItem], key: Callable[[DirectoryItem], tuple],
+) -> List[DirectoryItem]:
+    """Merges `added`, already ordered by `key`, into the ordered `entries`.
+
+    Timsort finds the two ordered runs and merges them in one linear pass.
+    """
+    merged = entries + added
+    merged.sort(key=key)
+    return merged
+
+
+class SortPreferences:
+    """The sort mode chosen for each directory, kept in a small JSON file.
+
+    Read on first use and rewritten on every change; only non-default modes are stored.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._modes: Optional[Dict[str, str]] = None
+
+    def get(self, directory: Path) -> str:
+        return self._load().get(str(directory), DEFAULT_SORT_MODE)
+
+    def set(self, directory: Path, mode: str) -> None:
+        modes = self._load()
+        modes.pop(str(directory), None)
+        if mode != DEFAULT_SORT_MODE:
+            modes[str(directory)] = mode
+            while len(modes) > MAX_REMEMBERED_DIRECTORIES:
+                del modes[next(iter(modes))]
+        self._save()
+
+    def _load(self) -> Dict[str, str]:
+        if self._modes is None:
+            self._modes = {}
+            if self.path is not None:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        stored = json.load(f)
+                    self._modes = {k: v for k, v in stored.items() if v in SORT_MODES}
+                except (OSError, ValueError, AttributeError):
+                    pass  # Missing or unreadable; start over with defaults.
+        return self._modes
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(".tmp")
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(self._modes, f, indent=1)
+            os.replace(temporary, self.path)
+        except OSError:
+            pass  # Preferences are a convenience; the session keeps its modes regardless.
@@ -0,0 +1,67 @@
+# startup.py
+
+import builtins
+import sys
+import time
+from typing import List, Optional, Set, Tuple
+
+PROFILE_FLAG = "--profile-startup"
+
+
+class StartupProfile:
+    """Import and first-frame timings behind `axon --profile-startup`.
+
+    Imports are timed through `builtins.__import__`, once per top-level module and
+    cumulatively (a module's time includes whatever it imports first), so the report
+    matches what `python -X importtime` would call the cumulative column.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.imports: List[Tuple[str, float, float]] = []  # (module, started at, seconds)
+        self.marks: List[Tuple[str, float]] = []
+        self._importing: Set[str] = set()
+        self._import = builtins.__import__
+
+    def begin(self, argv: List[str]) -> None:
+        """Starts timing imports if `argv` asks for the profile; call before the heavy imports."""
+        if PROFILE_FLAG not in argv or self.enabled:
+            return
+        self.enabled = True
+        builtins.__import__ = self._timed_import
+
+    def mark(self, label: str) -> None:
+        if self.enabled and label not in dict(self.marks):
+            self.marks.append((label, time.perf_counter()))
+
+    def finish(self) -> str:
+        """Stops timing and returns the report."""
+        builtins.__import__ = self._import
+        return self.report()
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        top = name.partition(".")[0]
+        if level or top in sys.modules or top in self._importing:
+            return self._import(name, globals, locals, fromlist, level)
+        self._importing.add(top)
+        started = time.perf_counter()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            self._importing.discard(top)
+            self.imports.append((top, started, time.perf_counter() - started))
+
+    def report(self, limit: int = 15) -> str:
+        first_frame: Optional[float] = dict(self.marks).get("first frame")
+        lines = ["Axon startup profile", "", "  Slowest imports (cumulative ms):"]
+        for name, started, seconds in sorted(self.imports, key=lambda row: -row[2])[:limit]:
+            late = first_frame is not None and started >= first_frame
+            lines.append(f"    {name:<24}{seconds * 1000:9.1f}{'  (after first frame)' if late else ''}")
+        lines += ["", "  Milestones (ms since start):"]
+        for label, at in self.marks:
+            lines.append(f"    {label:<24}{(at - self.started) * 1000:9.1f}")
+        return "\n".join(lines)
+
+
+profile = StartupProfile()
@@ -4,13 +4,17 @@ import os
 import stat
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Union
+from typing import TYPE_CHECKING, Optional, Dict, Union
 
-import chardet
-import git
-import humanize
 from rich.text import Text
 
+from metrics import traced
+from repos import repos
+from vcs import get_status_snapshot
+
+if TYPE_CHECKING:
+    import git
+
 # --- Constants: Icons and Colors ---
 
 FILE_ICONS: Dict[str, Text] = {
@@ -42,34 +46,22 @@ GIT_STATUS_ICONS: Dict[str, Text] = {
     "GIT_DIFF_REMOVE": Text("-", style="bold red"),
 }
 
-def get_git_repo(path: Path) -> Optional[git.Repo]:
-    try:
-        return git.Repo(str(path), search_parent_directories=True)
-    except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError):
-        return None
-
-def get_file_git_status(path: Path, repo: Optional[git.Repo]) -> tuple[str, Text]:
-    if not repo or not repo.working_dir:
-        return "", Text("")
-
-    try:
-        rel_path = path.relative_to(repo.working_dir)
-        str_rel_path = str(rel_path)
-
-        if str_rel_path in repo.untracked_files:
-            return "??", GIT_STATUS_ICONS["??"]
+def get_git_repo(path: Path) -> Optional["git.Repo"]:
+    """The shared handle of the innermost work tree around `path`; see repos.RepoRegistry."""
+    return repos.find(path)
 
-        if repo.is_dirty():
-            diffs = repo.index.diff(None)
-            for diff in diffs:
-                if diff.a_path == str_rel_path:
-                    return diff.change_type, GIT_STATUS_ICONS.get(diff.change_type, Text(""))
-    except Exception:
+@traced("git.file_status")
+def get_file_git_status(path: Path, repo: Optional["git.Repo"]) -> tuple[str, Text]:
+    snapshot = get_status_snapshot(repo)
+    if snapshot is None:
         return "", Text("")
-    return "", Text("")
+    status = snapshot.status_of(path)
+    return status, GIT_STATUS_ICONS.get(status, Text(""))
 
-def make_file_display(path: Path, repo: Optional[git.Repo]) -> Text:
-    if path.is_dir():
+def make_file_display(path: Path, repo: Optional["git.Repo"], is_dir: Optional[bool] = None) -> Text:
+    if is_dir is None:
+        is_dir = path.is_dir()
+    if is_dir:
         icon = FILE_ICONS["dir"]
     else:
         icon = FILE_ICONS.get(path.suffix.lower(), FILE_ICONS["file"])
@@ -82,20 +74,35 @@ def make_file_display(path: Path, repo: Optional[git.Repo]) -> Text:
     
     return display_text
 
+TEXT_EXTENSIONS = {'.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.yml', '.yaml', '.toml', '.ini', '.cfg', '.log', '.sh', '.bat', '.c', '.cpp', '.h', '.hpp', '.java', '.go', '.rs', '.rb', '.php'}
+# Bytes read from the start of a file to decide whether it is text.
+SNIFF_BYTES = 4096
+
+def looks_like_text(head: bytes) -> bool:
+    """Sniffs the first SNIFF_BYTES of a file: a NUL byte means binary."""
+    return b'\0' not in head[:SNIFF_BYTES]
+
 def is_likely_text_file(path: Path) -> bool:
-    text_extensions = {'.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.yml', '.yaml', '.toml', '.ini', '.cfg', '.log', '.sh', '.bat', '.c', '.cpp', '.h', '.hpp', '.java', '.go', '.rs', '.rb', '.php'}
-    if path.suffix.lower() in text_extensions:
+    if path.suffix.lower() in TEXT_EXTENSIONS:
         return True
     try:
         with open(path, "rb") as f:
-            chunk = f.read(4096)
-            if not chunk: return True
-            if b'\0' in chunk: return False
-        return True
+            return looks_like_text(f.read(SNIFF_BYTES))
     except (IOError, OSError):
         return False
 
+def user_cache_dir() -> Path:
+    """Where Axon keeps caches that outlive a session, following XDG on every platform."""
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "axon"
+
+def user_config_dir() -> Path:
+    """Where Axon keeps settings, following XDG on every platform."""
+    return Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config") / "axon"
+
+
 def get_file_metadata(path: Path) -> Dict[str, Union[str, Text]]:
+    import humanize
+
     try:
         st = path.stat()
         perms = stat.filemode(st.st_mode)
@@ -0,0 +1,541 @@
+# vcs.py
+
+import difflib
+import os
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, IO, Iterable, List, Optional, Set
+
+from metrics import traced
+from repos import repos
+
+if TYPE_CHECKING:
+    import git
+
+# When several changes roll up into one directory, the highest priority wins.
+STATUS_PRIORITY: Dict[str, int] = {"U": 6, "M": 5, "D": 4, "A": 3, "R": 2, "C": 2, "??": 1}
+
+# Above this many changed paths a full status pass is cheaper than a long pathspec.
+MAX_PATHSPECS = 500
+
+
+def parse_porcelain_status(output: str) -> Dict[str, str]:
+    """Parses `git status --porcelain=v1 -z` output into {relative path: status}."""
+    statuses: Dict[str, str] = {}
+    fields = iter(output.split("\0"))
+    for entry in fields:
+        if len(entry) < 4:
+            continue
+        xy, rel_path = entry[:2], entry[3:]
+        if xy[0] in "RC":
+            next(fields, None)  # Renames and copies carry the original path as an extra field.
+        if xy == "!!":
+            continue
+        if xy == "??":
+            status = "??"
+        elif "U" in xy or xy in ("AA", "DD"):
+            status = "U"
+        else:
+            status = xy[1] if xy[1] != " " else xy[0]
+        statuses[rel_path.rstrip("/")] = status
+    return statuses
+
+
+class GitStatusSnapshot:
+    """The status of a whole work tree, gathered with one porcelain pass and indexed by path."""
+
+    def __init__(self, repo: "git.Repo"):
+        self.repo = repo
+        self.root = Path(repo.working_dir)
+        self.leaves: Dict[str, str] = {}
+        self.statuses: Dict[str, str] = {}
+        self.untracked_dirs: Set[str] = set()
+        self._stamp: tuple = ()
+        self.refresh()
+
+    def refresh(self) -> None:
+        self._set_leaves(parse_porcelain_status(self._porcelain()))
+        # Taken after the pass, which may itself rewrite the index.
+        self._stamp = self._current_stamp()
+
+    @property
+    def stale(self) -> bool:
+        """True once HEAD or the index has changed since the last full pass (a commit, checkout, stage or reset).
+
+        Edits in the work tree are left to the watcher and `refresh_paths`.
+        """
+        return self._current_stamp() != self._stamp
+
+    def _current_stamp(self) -> tuple:
+        try:
+            index_mtime = os.stat(os.path.join(self.repo.git_dir, "index")).st_mtime_ns
+        except OSError:
+            index_mtime = 0
+        return head_sha(self.repo), index_mtime
+
+    def refresh_paths(self, paths: Iterable[Path]) -> None:
+        """Re-ranks only `paths` (and anything below them), leaving the rest of the snapshot as is."""
+        rel_paths = set()
+        for path in paths:
+            try:
+                rel_path = path.relative_to(self.root).as_posix()
+            except ValueError:
+                continue
+            if rel_path != "." and rel_path.split("/")[0] != ".git":
+                rel_paths.add(rel_path)
+        if not rel_paths:
+            return
+        if len(rel_paths) > MAX_PATHSPECS:
+            self.refresh()
+            return
+        leaves = {
+            rel_path: status for rel_path, status in self.leaves.items()
+            if not any("/".join(rel_path.split("/")[:depth]) in rel_paths for depth in range(1, rel_path.count("/") + 2))
+        }
+        leaves.update(parse_porcelain_status(self._porcelain("--", *sorted(rel_paths))))
+        self._set_leaves(leaves)
+
+    @traced("git.status")
+    def _porcelain(self, *pathspec: str) -> str:
+        from git.exc import GitCommandError
+
+        try:
+            return self.repo.git.status("--porcelain=v1", "-z", "--untracked-files=normal", *pathspec)
+        except GitCommandError:
+            return ""
+
+    def _set_leaves(self, leaves: Dict[str, str]) -> None:
+        """Swaps in new lookup tables whole, so readers on other threads never see a partial update."""
+        untracked_dirs = {
+            rel for rel, status in leaves.items()
+            if status == "??" and (self.root / rel).is_dir()
+        }
+        statuses = dict(leaves)
+        self._rollup(statuses)
+        self.leaves, self.statuses, self.untracked_dirs = leaves, statuses, untracked_dirs
+
+    @staticmethod
+    def _rollup(statuses: Dict[str, str]) -> None:
+        """Propagates every change to its ancestor directories so folders show a status too."""
+        rollups: Dict[str, str] = {}
+        for rel_path, status in statuses.items():
+            parts = rel_path.split("/")
+            for depth in range(1, len(parts)):
+                ancestor = "/".join(parts[:depth])
+                current = rollups.get(ancestor)
+                if current is None or STATUS_PRIORITY.get(status, 0) > STATUS_PRIORITY.get(current, 0):
+                    rollups[ancestor] = status
+        for ancestor, status in rollups.items():
+            statuses.setdefault(ancestor, status)
+
+    def statuses_below(self, directory: Path) -> Dict[str, str]:
+        """{name: status} for the direct children of `directory` that have changes."""
+        try:
+            rel_dir = directory.relative_to(self.root).as_posix()
+        except ValueError:
+            return {}
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        return {
+            rel_path[len(prefix):]: status for rel_path, status in self.statuses.items()
+            if rel_path.startswith(prefix) and "/" not in rel_path[len(prefix):]
+        }
+
+    def status_of(self, path: Path) -> str:
+        try:
+            rel_path = path.relative_to(self.root).as_posix()
+        except ValueError:
+            return ""
+        status = self.statuses.get(rel_path)
+        if status is not None:
+            return status
+        # Files below an untracked directory are reported only through the directory itself.
+        if self.untracked_dirs:
+            parts = rel_path.split("/")
+            for depth in range(len(parts) - 1, 0, -1):
+                if "/".join(parts[:depth]) in self.untracked_dirs:
+                    return "??"
+        return ""
+
+
+def head_sha(repo: Optional["git.Repo"]) -> Optional[str]:
+    """The commit HEAD points at, asked of the repo's long-lived `cat-file --batch-check`."""
+    if not repo:
+        return None
+    return repos.cat_file(repo).resolve("HEAD")  # None on an unborn branch.
+
+
+_snapshots: Dict[str, GitStatusSnapshot] = {}
+
+
+def get_status_snapshot(repo: "git.Repo", refresh: bool = False) -> Optional[GitStatusSnapshot]:
+    """Returns the shared snapshot for `repo`, taking it on first use, or again if `refresh` is set and it is stale."""
+    if not repo or not repo.working_dir:
+        return None
+    snapshot = _snapshots.get(repo.working_dir)
+    if snapshot is None:
+        snapshot = _snapshots[repo.working_dir] = GitStatusSnapshot(repo)
+    elif refresh and snapshot.stale:
+        snapshot.refresh()
+    return snapshot
+
+
+# Lines read from `git diff` per lazy load.
+DIFF_CHUNK_LINES = 2000
+# Files up to this size are diffed in-process against their HEAD blob instead of by `git diff`.
+MAX_INLINE_DIFF_BYTES = 256 * 1024
+
+
+class ParsedDiff:
+    """A unified diff held as parallel line/kind arrays, with the offsets of its hunks.
+
+    Lines are read from the git process a chunk at a time, so a diff of a regenerated
+    lockfile is only parsed as far as the viewer has scrolled.
+    """
+
+    HEADER, HUNK, ADD, REMOVE, CONTEXT = range(5)
+
+    def __init__(self, process=None):
+        self.lines: List[str] = []
+        self.kinds = bytearray()
+        self.hunks = array("I")
+        self._process = process
+        self._stream: Optional[IO[bytes]] = process.stdout if process is not None else None
+        self._in_header = False
+
+    @classmethod
+    def from_text(cls, text: str) -> "ParsedDiff":
+        diff = cls()
+        diff.feed(text.splitlines())
+        return diff
+
+    @property
+    def complete(self) -> bool:
+        return self._stream is None
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(map(sys.getsizeof, self.lines)) + len(self.kinds) + self.hunks.itemsize * len(self.hunks)
+
+    def feed(self, lines: Iterable[str]) -> None:
+        new_lines: List[str] = []
+        kinds = bytearray()
+        hunks = array("I")
+        for line in lines:
+            if line.startswith("diff --git"):
+                self._in_header = True
+                kind = self.HEADER
+            elif line.startswith("@@"):
+                self._in_header = False
+                hunks.append(len(self.lines) + len(new_lines))
+                kind = self.HUNK
+            elif self._in_header:
+                kind = self.HEADER
+            elif line.startswith("+"):
+                kind = self.ADD
+            elif line.startswith("-"):
+                kind = self.REMOVE
+            else:
+                kind = self.CONTEXT
+            new_lines.append(line)
+            kinds.append(kind)
+        # Lines go in before kinds, so a reader on another thread that trusts len(kinds) never
+        # sees a line without its kind.
+        self.lines.extend(new_lines)
+        self.kinds.extend(kinds)
+        self.hunks.extend(hunks)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.kinds)
+
+    def load_chunk(self, max_lines: int = DIFF_CHUNK_LINES) -> bool:
+        """Parses up to `max_lines` more lines from git; returns True once the diff is complete."""
+        if self._stream is None:
+            return True
+        chunk = []
+        for raw in self._stream:
+            chunk.append(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+            if len(chunk) >= max_lines:
+                break
+        else:
+            self.close()
+        self.feed(chunk)
+        return self.complete
+
+    def next_hunk(self, line_no: int) -> Optional[int]:
+        index = bisect_right(self.hunks, line_no)
+        return self.hunks[index] if index < len(self.hunks) else None
+
+    def previous_hunk(self, line_no: int) -> Optional[int]:
+        index = bisect_left(self.hunks, line_no)
+        return self.hunks[index - 1] if index > 0 else None
+
+    def close(self) -> None:
+        """Stops reading; kills git if the diff was abandoned before it was fully read."""
+        if self._process is not None:
+            if self._process.proc.poll() is None:
+                self._process.proc.kill()
+            self._process.proc.wait()
+            self._process = None
+        self._stream = None
+
+
+def open_diff(repo: "git.Repo", path: Path) -> ParsedDiff:
+    """Diffs `path` against HEAD: small text files in-process, anything else through a streamed `git diff HEAD`."""
+    rel_path = path.relative_to(repo.working_dir).as_posix()
+    diff = _inline_diff(repo, path, rel_path)
+    if diff is not None:
+        return diff
+    diff = ParsedDiff(repo.git.diff("HEAD", "--", rel_path, as_process=True))
+    diff.load_chunk()
+    return diff
+
+
+def _inline_diff(repo: "git.Repo", path: Path, rel_path: str) -> Optional[ParsedDiff]:
+    """A diff against the HEAD blob read through cat-file, saving a git process per preview.
+
+    Returns None for anything `git diff` shows differently: binaries, files without a final
+    newline, mode-only changes and files that are new since HEAD.
+    """
+    try:
+        if path.stat().st_size > MAX_INLINE_DIFF_BYTES:
+            return None
+        new = path.read_bytes()
+    except OSError:
+        return None
+    old = repos.cat_file(repo).read(f"HEAD:{rel_path}", max_size=MAX_INLINE_DIFF_BYTES)
+    if old is None or old == new:
+        return None
+    if any(b"\0" in content[:8192] or (content and not content.endswith(b"\n")) for content in (old, new)):
+        return None
+    diff = ParsedDiff()
+    diff.feed([f"diff --git a/{rel_path} b/{rel_path}"])
+    diff.feed(difflib.unified_diff(_split_lines(old), _split_lines(new), f"a/{rel_path}", f"b/{rel_path}", lineterm=""))
+    return diff
+
+
+def _split_lines(content: bytes) -> List[str]:
+    """Lines as git counts them: split on newlines only, each without its line ending."""
+    if not content:
+        return []
+    if content.endswith(b"\n"):
+        content = content[:-1]
+    return [line.rstrip("\r") for line in content.decode("utf-8", errors="replace").split("\n")]
+
+
+# Commits read from `git log` per lazy load.
+LOG_PAGE_COMMITS = 200
+# Lines attributed per block; `git blame -L` runs only for the blocks the view reaches.
+BLAME_BLOCK_LINES = 200
+# Blobs above this size are not blamed.
+MAX_BLAME_BYTES = 16 * 1024 * 1024
+
+
+class CommitInfo:
+    __slots__ = ("sha", "author", "time", "summary")
+
+    def __init__(self, sha: str, author: str, time: int, summary: str):
+        self.sha = sha
+        self.author = author
+        self.time = time
+        self.summary = summary
+
+
+class FileHistory:
+    """The commits that touched a path as of one HEAD, newest first, read from `git log` a page at a time.
+
+    Git writes into a pipe that is only drained as the view scrolls, so it never walks much
+    further than has been shown. A closed history keeps its commits; reading on restarts git
+    past them.
+    """
+
+    def __init__(self, repo: "git.Repo", rel_path: str, head: str, follow: bool = True):
+        self.repo = repo
+        self.rel_path = rel_path
+        self.head = head
+        # Renames are followed for single files only; git cannot follow a directory.
+        self.follow = follow
+        self.commits: List[CommitInfo] = []
+        self.complete = False
+        self.error = ""
+        self._process = None
+        # Commits a restarted git repeats, to be dropped before any are added.
+        self._repeated = 0
+        self._lock = threading.Lock()
+        self._size = 0
+        # Called after each page, so a cache holding the history can re-measure it.
+        self.on_grow: Optional[Callable[[], None]] = None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    @traced("git.log")
+    def load_page(self, max_commits: int = LOG_PAGE_COMMITS) -> bool:
+        """Reads up to `max_commits` more commits; returns True once the history is complete."""
+        from git.exc import GitCommandError
+
+        with self._lock:
+            if self.complete:
+                return True
+            process = self._process
+            if process is None:
+                args = ["--format=%H%x00%an%x00%at%x00%s"]
+                if self.follow:
+                    # --skip counts commits before --follow filters them, so the repeats are dropped here.
+                    args.append("--follow")
+                    self._repeated = len(self.commits)
+                else:
+                    args.append(f"--skip={len(self.commits)}")
+                try:
+                    process = self._process = self.repo.git.log(self.head, *args, "--", self.rel_path, as_process=True)
+                except GitCommandError as e:
+                    self.error, self.complete = str(e), True
+                    return True
+            page = []
+            for raw in process.proc.stdout:
+                fields = raw.decode("utf-8", errors="replace").rstrip("\n").split("\0")
+                if len(fields) != 4 or not fields[2].isdigit():
+                    continue
+                if self._repeated:
+                    self._repeated -= 1
+                else:
+                    page.append(CommitInfo(fields[0], fields[1], int(fields[2]), fields[3]))
+                if len(page) >= max_commits:
+                    break
+            else:
+                # The end of the log, unless close() killed git while it was being read.
+                if self._process is process:
+                    self._process = None
+                    self.complete = True
+                    if process.proc.wait() != 0:
+                        self.error = process.proc.stderr.read().decode("utf-8", errors="replace").strip()
+            self.commits.extend(page)
+            self._size += sum(sys.getsizeof(commit.summary) + 160 for commit in page)
+        if self.on_grow is not None:
+            self.on_grow()
+        return self.complete
+
+    def close(self) -> None:
+        """Ends the git process, keeping what was read. Safe to call while a page is being read."""
+        process, self._process = self._process, None
+        if process is not None:
+            if process.proc.poll() is None:
+                process.proc.kill()
+            process.proc.wait()
+
+
+class FileBlame:
+    """The commit behind each line of a file as of one HEAD, attributed a block of lines at a time.
+
+    The blob's lines come from cat-file in one read, so the view can scroll the whole file
+    straight away; `git blame -L` is then run only for the blocks that come into view.
+    """
+
+    def __init__(self, repo: "git.Repo", rel_path: str, head: str):
+        self.repo = repo
+        self.rel_path = rel_path
+        self.head = head
+        self.lines: Optional[List[str]] = None
+        self.error = ""
+        self.commits: List[CommitInfo] = []
+        # The index into `commits` of each line's commit; -1 until its block is blamed.
+        self.line_commits = array("i")
+        self._commit_index: Dict[str, int] = {}
+        self._blamed: Set[int] = set()
+        self._lock = threading.Lock()
+        self._lines_size = 0
+        # Called after the lines or a range of blame are read, so a cache holding the blame can re-measure it.
+        self.on_grow: Optional[Callable[[], None]] = None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._lines_size + self.line_commits.itemsize * len(self.line_commits) + 200 * len(self.commits)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.lines) if self.lines is not None else 0
+
+    def load_lines(self) -> None:
+        """Reads the file as of HEAD; sets `error` instead if it cannot be blamed."""
+        with self._lock:
+            if self.lines is not None:
+                return
+            cat_file = repos.cat_file(self.repo)
+            header = cat_file.header(f"{self.head}:{self.rel_path}")
+            content = None
+            if header is None or header[1] != "blob":
+                self.error = "Not committed yet."
+            elif header[2] > MAX_BLAME_BYTES:
+                self.error = "Too large to blame."
+            else:
+                content = cat_file.read(header[0])
+                if content is None:
+                    self.error = "Could not read the file from HEAD."
+                elif b"\0" in content[:8192]:
+                    self.error, content = "Binary file.", None
+            lines = _split_lines(content) if content is not None else []
+            self.line_commits = array("i", [-1]) * len(lines)
+            self._lines_size = sum(map(sys.getsizeof, lines))
+            self.lines = lines
+        if self.on_grow is not None:
+            self.on_grow()
+
+    def missing_blocks(self, start: int, end: int) -> List[int]:
+        """The blocks overlapping lines [start, end) that are not blamed yet."""
+        end = min(end, self.line_count)
+        return [
+            block for block in range(max(0, start) // BLAME_BLOCK_LINES, -(-end // BLAME_BLOCK_LINES))
+            if block not in self._blamed
+        ]
+
+    @traced("git.blame")
+    def load_range(self, start: int, end: int) -> None:
+        """Blames whatever of lines [start, end) is not blamed yet, with one `git blame` call."""
+        from git.exc import GitCommandError
+
+        with self._lock:
+            blocks = self.missing_blocks(start, end)
+            if not blocks:
+                return
+            ranges = []
+            for block in blocks:
+                first = block * BLAME_BLOCK_LINES + 1
+                ranges += ["-L", f"{first},{min(first + BLAME_BLOCK_LINES - 1, self.line_count)}"]
+            try:
+                output = self.repo.git.blame("--porcelain", *ranges, self.head, "--", self.rel_path)
+            except GitCommandError as e:
+                self.error = str(e)
+                return
+            self._parse_porcelain(output)
+            self._blamed.update(blocks)
+        if self.on_grow is not None:
+            self.on_grow()
+
+    def _parse_porcelain(self, output: str) -> None:
+        """Fills `line_commits` from `git blame --porcelain`: a header per line, commit details on first sight."""
+        fields: Dict[str, str] = {}
+        sha, line_no = "", 0
+        for line in output.split("\n"):
+            if not sha:
+                parts = line.split(" ")
+                if len(parts) >= 3 and parts[2].isdigit():
+                    sha, line_no = parts[0], int(parts[2]) - 1
+                    fields = {}
+            elif line.startswith("\t"):
+                index = self._commit_index.get(sha)
+                if index is None:
+                    index = self._commit_index[sha] = len(self.commits)
+                    time = fields.get("author-time", "0")
+                    self.commits.append(CommitInfo(
+                        sha, fields.get("author", ""), int(time) if time.isdigit() else 0, fields.get("summary", ""),
+                    ))
+                if 0 <= line_no < len(self.line_commits):
+                    self.line_commits[line_no] = index
+                sha = ""
+            else:
+                key, _, value = line.partition(" ")
+                fields[key] = value
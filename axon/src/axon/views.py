@@ -1,68 +1,384 @@
 # views.py
 
+import asyncio
 import base64
+import time
+from bisect import bisect_left
+from functools import partial
+from operator import attrgetter
 from pathlib import Path
-from typing import Set, Optional
+from typing import TYPE_CHECKING, Dict, List, Set, Optional, Tuple, Union
 
-import git
 from rich.panel import Panel
-from rich.syntax import Syntax
-from rich.table import Table
 from rich.text import Text
 
-from textual.containers import Horizontal, VerticalScroll
+from textual import events, work
+from textual.binding import Binding
+from textual.containers import Horizontal
 from textual.message import Message
 from textual.reactive import reactive
-from textual.widgets import Static, ListView, Label
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
+from textual.widgets import Static
 from textual.widgets import TabbedContent, TabPane
 from textual.widget import Widget
+from textual.worker import get_current_worker
 
-from utils import get_file_metadata, is_likely_text_file, get_file_git_status
-from widgets import DirectoryItem, GitDiffLine
+from archives import archive_cache, in_archive, is_directory, split_archive_path
+from dirsize import DirSizeScan
+from listing import (
+    DirectoryItem, DirectoryListing, ListingPatch, directory_mtime_ns, iter_directory_batches, listing_cache,
+)
+from metrics import traced
+from formats import HEADER_BYTES, sniff_format
+from preview import BinaryInfo, DirectoryInfo, PreviewCache, PreviewContent, StreamedText, highlight_text, metadata_panel
+from sorting import entry_key, merge_sorted, sort_entries
+from utils import TEXT_EXTENSIONS, get_file_metadata, is_likely_text_file, get_file_git_status, looks_like_text, make_file_display
+from vcs import FileBlame, FileHistory, ParsedDiff, get_status_snapshot, head_sha, open_diff
+from widgets import BinaryPreview, BlameView, DiffView, DirectorySummary, HistoryView, TextPreview
+
+if TYPE_CHECKING:
+    import git
+
+# Seconds between pushes of a running directory scan into its column.
+SCAN_UPDATE_INTERVAL = 0.1
+
+class DirectoryBrowser(ScrollView, can_focus=True):
+    """A column in the Miller Column layout.
+
+    Entries are kept as DirectoryItem records and only the visible rows are rendered, so a
+    column costs the same to draw whether it holds ten entries or a hundred thousand.
+    """
+
+    BINDINGS = [
+        Binding("enter", "select_cursor", "Select", show=False),
+        Binding("up,k", "cursor_up", "Cursor Up", show=False),
+        Binding("down,j", "cursor_down", "Cursor Down", show=False),
+        Binding("home,g", "cursor_first", "First", show=False),
+        Binding("end,G", "cursor_last", "Last", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+    ]
+
+    COMPONENT_CLASSES = {"directory-browser--highlight", "directory-browser--selected"}
+
+    index: reactive[Optional[int]] = reactive(None)
 
-class DirectoryBrowser(ListView):
-    """A column in the Miller Column layout."""
-    
     class Selected(Message):
         def __init__(self, path: Path):
             self.path = path
             super().__init__()
 
+    class Highlighted(Message):
+        """Posted when the cursor of the focused column lands on an entry."""
+        def __init__(self, path: Path):
+            self.path = path
+            super().__init__()
+
     def __init__(self, path: Path, repo, *, id: str):
         super().__init__(id=id)
         self.path = path
         self.repo = repo
+        # (archive file, member directory) when the column browses inside an archive.
+        self.archive = split_archive_path(path)
+        self.scanning = False
+        self._all_entries: List[DirectoryItem] = []
+        self.entries: List[DirectoryItem] = []
         self.selected_paths: Set[Path] = set()
+        self._reveal_name: Optional[str] = None
+        # Recursive sizes of subdirectories, measured for the sort-by-size mode.
+        self._dir_sizes: Dict[str, int] = {}
+        self._size_scans: Dict[str, DirSizeScan] = {}
+        self._size_timer: Optional[Timer] = None
+
+    @property
+    def highlighted_child(self) -> Optional[DirectoryItem]:
+        if self.index is None or not 0 <= self.index < len(self.entries):
+            return None
+        return self.entries[self.index]
 
+    @traced("browser.mount")
     def on_mount(self) -> None:
-        try:
-            paths = sorted(
-                self.path.iterdir(),
-                key=lambda p: (not p.is_dir(), p.name.lower())
+        self.loading = True
+        self.scanning = True
+        self._scan_directory()
+
+    def on_unmount(self) -> None:
+        self._stop_measuring()
+
+    @work(thread=True, exclusive=True, group="scan")
+    @traced("browser.scan")
+    def _scan_directory(self) -> None:
+        """Lists the directory off the event loop, streaming batches into the column.
+
+        A cached listing that is still current is used as-is; otherwise the scan result is
+        cached once it completes.
+        """
+        worker = get_current_worker()
+        if self.archive is not None:
+            self._list_archive(worker)
+            return
+        listing = listing_cache.get(self.path)
+        if listing is None:
+            mtime_ns = directory_mtime_ns(self.path)
+            scanned: List[DirectoryItem] = []
+            pending: List[DirectoryItem] = []
+            shown_at: Optional[float] = None
+            for batch in iter_directory_batches(self.path, is_cancelled=lambda: worker.is_cancelled):
+                if worker.is_cancelled:
+                    return
+                scanned.extend(batch)
+                pending.extend(batch)
+                # The first batch is shown at once; later ones are handed over at most once per
+                # interval, so a huge directory costs the event loop a few merges, not one per batch.
+                if shown_at is None or time.monotonic() - shown_at >= SCAN_UPDATE_INTERVAL:
+                    pending.sort(key=attrgetter("sort_key"))
+                    self.app.call_from_thread(self._show_listing if shown_at is None else self._add_entries, pending)
+                    pending, shown_at = [], time.monotonic()
+            if worker.is_cancelled:
+                return
+            if shown_at is None or pending:
+                pending.sort(key=attrgetter("sort_key"))
+                self.app.call_from_thread(self._show_listing if shown_at is None else self._add_entries, pending)
+            # Each batch arrives in name order, so this only merges the runs.
+            scanned.sort(key=attrgetter("sort_key"))
+            listing = DirectoryListing(self.path, mtime_ns, scanned)
+            if mtime_ns is not None:
+                listing_cache.put(listing)
+        else:
+            self.app.call_from_thread(self._show_listing, listing.entries)
+        self.app.call_from_thread(self._finish_scan)
+
+    def _list_archive(self, worker) -> None:
+        """Lists a directory inside an archive from its cached member index; nothing is extracted."""
+        index = archive_cache.get(self.archive[0], lambda: worker.is_cancelled)
+        if worker.is_cancelled:
+            return
+        if index is not None and index.is_file(self.archive[1]):
+            # Opened as a directory before the archive was indexed; select the file instead.
+            self.app.call_from_thread(self.app.set_current_path, self.path)
+            return
+        entries = index.listing(self.archive[1]) if index is not None else []
+        self.app.call_from_thread(self._show_listing, entries)
+        self.app.call_from_thread(self._finish_scan)
+        if index is None:
+            self.app.call_from_thread(self.notify, f"Could not read {self.archive[0].name}", severity="error")
+
+    def _show_listing(self, entries: List[DirectoryItem]) -> None:
+        self._all_entries = entries
+        self.loading = False
+        self.border_subtitle = f"loading… {len(entries)}"
+        self.apply_filter()
+
+    def _add_entries(self, added: List[DirectoryItem]) -> None:
+        """Merges entries from the running scan into the column, leaving the rows it holds in place."""
+        self._all_entries = merge_sorted(self._all_entries, added, attrgetter("sort_key"))
+        self.border_subtitle = f"loading… {len(self._all_entries)}"
+        self.apply_filter(added)
+
+    def apply_filter(self, added: Optional[List[DirectoryItem]] = None) -> None:
+        """Rebuilds the visible rows from the listing, hiding dotfiles unless the app shows them.
+
+        With `added`, only those new name-ordered entries are filtered, sorted and merged in.
+        """
+        highlighted = self.highlighted_child
+        source = self._all_entries if added is None else added
+        if self.app.show_hidden:
+            entries = source
+        else:
+            entries = [entry for entry in source if not entry.is_hidden]
+        mode = self.sort_mode
+        if mode == "size" and self.archive is None:
+            self._measure_subdirectories(entries)
+        elif self._size_scans:
+            self._stop_measuring()
+        statuses = None
+        if mode == "git":
+            snapshot = get_status_snapshot(self.repo)
+            statuses = snapshot.statuses_below(self.path) if snapshot is not None else {}
+        if added is not None:
+            key = entry_key(mode, self._size_of, statuses)
+            entries = sort_entries(entries, mode, self._size_of, statuses)
+            if highlighted is not None and self.index:
+                # Shift the cursor past the new rows that sort above it.
+                self.index += bisect_left([key(entry) for entry in entries], key(highlighted))
+            self.entries = merge_sorted(self.entries, entries, key)
+            self.virtual_size = Size(0, len(self.entries))
+            if self._reveal_name is not None:
+                self.reveal(self._reveal_name)
+            self.refresh()
+            return
+        self.entries = sort_entries(entries, mode, self._size_of, statuses)
+        self.virtual_size = Size(0, len(self.entries))
+        # Keep the cursor on the same entry while earlier rows stream in around it, unless it
+        # is still resting on the first row.
+        if highlighted is not None and self.index:
+            # Entries are matched by name, since a patch replaces the records it re-reads.
+            name = highlighted.name
+            self.index = next(
+                (index for index, entry in enumerate(self.entries) if entry.name == name),
+                # The highlighted entry was filtered out or removed; stay at the same row.
+                min(self.index, len(self.entries) - 1),
             )
-            for path in paths:
-                if not self.app.show_hidden and path.name.startswith('.'):
-                    continue
-                self.append(DirectoryItem(path, self.repo))
-        except OSError:
-            pass
+        else:
+            self.index = 0
+        if self._reveal_name is not None:
+            self.reveal(self._reveal_name)
+        self.refresh()
+
+    @property
+    def sort_mode(self) -> str:
+        return self.app.sort_preferences.get(self.path)
+
+    def statuses_changed(self) -> None:
+        """Redraws the git markers, re-sorting too when the column is ordered by them."""
+        if self.sort_mode == "git":
+            self.apply_filter()
+        else:
+            self.refresh()
+
+    def _finish_scan(self) -> None:
+        self.scanning = False
+        self.loading = False
+        self.border_subtitle = ""
+        self._reveal_name = None
+
+    def apply_patch(self, patch: ListingPatch) -> None:
+        """Applies filesystem changes in place, keeping scroll position, highlight and selection."""
+        if self.scanning:
+            # The running scan may already be past the changed entries; start it over.
+            self._scan_directory()
+            return
+        for name in patch.removed_names:
+            self.selected_paths.discard(self.path / name)
+        for name in (patch.changed if patch.changed is not None else list(self._dir_sizes)):
+            self._dir_sizes.pop(name, None)
+        self._all_entries = patch.apply(self._all_entries)
+        if patch.mtime_ns is not None:
+            listing_cache.put(DirectoryListing(self.path, patch.mtime_ns, self._all_entries))
+        self.apply_filter()
+
+    def _size_of(self, entry: DirectoryItem) -> int:
+        # Directories still being measured sort last until their size is known. Inside an
+        # archive the index has already totalled them.
+        return self._dir_sizes.get(entry.name, -1) if entry.is_dir and self.archive is None else entry.size
+
+    def _measure_subdirectories(self, entries: List[DirectoryItem]) -> None:
+        for entry in entries:
+            if entry.is_dir and entry.name not in self._dir_sizes and entry.name not in self._size_scans:
+                self._size_scans[entry.name] = self.app.dir_sizer.scan(entry.path)
+        if self._size_scans and self._size_timer is None:
+            self._size_timer = self.set_interval(0.3, self._collect_sizes)
 
-    def on_list_view_selected(self, event: ListView.Selected) -> None:
-        if isinstance(event.item, DirectoryItem):
-            self.post_message(self.Selected(event.item.path))
+    def _collect_sizes(self) -> None:
+        finished = [name for name, scan in self._size_scans.items() if scan.done]
+        for name in finished:
+            self._dir_sizes[name] = self._size_scans.pop(name).size
+        if not self._size_scans:
+            self._size_timer.stop()
+            self._size_timer = None
+        if finished:
+            self.apply_filter()
+
+    def _stop_measuring(self) -> None:
+        for scan in self._size_scans.values():
+            scan.cancel()
+        self._size_scans.clear()
+        if self._size_timer is not None:
+            self._size_timer.stop()
+            self._size_timer = None
+
+    def reveal(self, name: str) -> None:
+        """Highlights the entry called `name`, or does so once the scan reaches it."""
+        for index, entry in enumerate(self.entries):
+            if entry.name == name:
+                self.index = index
+                self._reveal_name = None
+                return
+        self._reveal_name = name
+
+    def validate_index(self, index: Optional[int]) -> Optional[int]:
+        if index is None or not self.entries:
+            return None
+        return max(0, min(index, len(self.entries) - 1))
+
+    def watch_index(self, old_index: Optional[int], new_index: Optional[int]) -> None:
+        if old_index is not None:
+            self.refresh_line(old_index)
+        if new_index is not None:
+            self.refresh_line(new_index)
+            if self.has_focus:
+                self.post_message(self.Highlighted(self.entries[new_index].path))
+            height = self.scrollable_content_region.height
+            if new_index < self.scroll_offset.y:
+                self.scroll_to(y=new_index, animate=False)
+            elif height and new_index >= self.scroll_offset.y + height:
+                self.scroll_to(y=new_index - height + 1, animate=False)
+
+    def render_line(self, y: int) -> Strip:
+        index = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        if index >= len(self.entries):
+            return Strip.blank(width, self.rich_style)
+        entry = self.entries[index]
+        style = self.rich_style
+        if entry.path in self.selected_paths:
+            style += self.get_component_rich_style("directory-browser--selected")
+        elif index == self.index:
+            style += self.get_component_rich_style("directory-browser--highlight")
+        display = Text.assemble(" ", make_file_display(entry.path, self.repo, entry.is_dir), " ", style=style)
+        display.no_wrap = True
+        return Strip(display.render(self.app.console)).crop_extend(0, width, style)
+
+    def on_focus(self) -> None:
+        if (entry := self.highlighted_child) is not None:
+            self.post_message(self.Highlighted(entry.path))
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        index = self.scroll_offset.y + offset.y
+        if index < len(self.entries):
+            self.index = index
+            self.action_select_cursor()
+
+    def action_select_cursor(self) -> None:
+        if (entry := self.highlighted_child) is not None:
+            self.post_message(self.Selected(entry.path))
+
+    def action_cursor_up(self) -> None:
+        if self.index is not None:
+            self.index -= 1
+
+    def action_cursor_down(self) -> None:
+        if self.index is not None:
+            self.index += 1
+
+    def action_cursor_first(self) -> None:
+        if self.entries:
+            self.index = 0
+
+    def action_cursor_last(self) -> None:
+        if self.entries:
+            self.index = len(self.entries) - 1
+
+    def action_page_up(self) -> None:
+        if self.index is not None:
+            self.index -= max(1, self.scrollable_content_region.height)
+
+    def action_page_down(self) -> None:
+        if self.index is not None:
+            self.index += max(1, self.scrollable_content_region.height)
 
     def toggle_selection(self, path: Path):
         if path in self.selected_paths:
             self.selected_paths.remove(path)
         else:
             self.selected_paths.add(path)
-        
-        for child in self.children:
-            if isinstance(child, DirectoryItem):
-                if child.path in self.selected_paths:
-                    child.add_class("selected")
-                else:
-                    child.remove_class("selected")
+        self.refresh()
 
 
 class MillerColumns(Horizontal):
@@ -73,32 +389,79 @@ class MillerColumns(Horizontal):
         super().__init__(*args, **kwargs)
         self.repo = None
         self._current_path_rendered: Optional[Path] = None
+        self._render_lock = asyncio.Lock()
 
-    def watch_path(self, new_path: Optional[Path]) -> None:
+    @traced("columns.watch_path")
+    async def watch_path(self, new_path: Optional[Path]) -> None:
         """Called when the path reactive property changes."""
-        # vvv FINAL FIX: This guardrail prevents re-rendering the same path, solving the race condition. vvv
-        if new_path is None or new_path == self._current_path_rendered:
-            return
-        
-        self._current_path_rendered = new_path
-        
-        self.repo = self.app.repo
-        self.remove_children()
+        # Path changes can arrive while columns are still being swapped; handle them one at a time.
+        async with self._render_lock:
+            new_path = self.path
+            # vvv FINAL FIX: This guardrail prevents re-rendering the same path, solving the race condition. vvv
+            if new_path is None or new_path == self._current_path_rendered:
+                return
+
+            self._current_path_rendered = new_path
 
-        paths_to_render = list(reversed(new_path.parents))
-        paths_to_render.append(new_path)
+            # The app refreshes the status snapshot in the background after each move and
+            # redraws the columns when it lands; until then they show the previous one.
+            self.repo = self.app.repo
 
-        for i, path_part in enumerate(paths_to_render):
-            if path_part.is_dir():
-                self.mount(DirectoryBrowser(path_part, self.repo, id=f"browser-{i}"))
+            paths_to_render = list(reversed(new_path.parents))
+            paths_to_render.append(new_path)
 
-        if self.children:
-            self.call_after_refresh(self.children[-1].focus)
-            self.call_after_refresh(self.scroll_end, animate=False)
+            # Columns for the shared prefix of the old and new path stay mounted untouched,
+            # keeping their scroll position, highlight and selection.
+            browsers = list(self.query(DirectoryBrowser))
+            kept = 0
+            for browser, path_part in zip(browsers, paths_to_render):
+                if browser.path != path_part:
+                    break
+                kept += 1
+            if browsers[kept:]:
+                await self.remove_children(browsers[kept:])
+            for browser in browsers[:kept]:
+                browser.refresh()
+
+            new_browsers = [
+                DirectoryBrowser(path_part, self.repo, id=f"browser-{i}")
+                for i, path_part in enumerate(paths_to_render[kept:], start=kept)
+                if is_directory(path_part)
+            ]
+            for browser in new_browsers:
+                child = paths_to_render[int(browser.id.split("-")[1]) + 1:][:1]
+                if child:
+                    browser.reveal(child[0].name)
+            if new_browsers:
+                await self.mount_all(new_browsers)
+
+            self.reveal_selected()
+            self.app.fs_watcher.watch(browser.path for browser in self.query(DirectoryBrowser) if browser.archive is None)
+            if self.children:
+                self.call_after_refresh(self.children[-1].focus)
+                self.call_after_refresh(self.scroll_end, animate=False)
+
+    def reveal_selected(self) -> None:
+        """Highlights the app's selected path in the column of its directory, if that column is shown."""
+        selected = self.app.selected_path
+        if selected is None:
+            return
+        for browser in self.query(DirectoryBrowser):
+            if browser.path == selected.parent:
+                browser.reveal(selected.name)
+
+    def on_directory_browser_highlighted(self, message: DirectoryBrowser.Highlighted) -> None:
+        if message.path != self.app.selected_path:
+            self.app.selected_path = message.path
+            self.app.preview_line = None
+            self.app.update_preview()
 
     def on_directory_browser_selected(self, message: DirectoryBrowser.Selected) -> None:
+        if message.path != self.app.selected_path:
+            self.app.preview_line = None
         self.app.selected_path = message.path
-        if message.path.is_dir():
+        self.app.remember(message.path)
+        if is_directory(message.path):
             if message.path != self.path:
                 self.path = message.path
         else:
@@ -110,44 +473,209 @@ class PreviewPane(Static):
     def __init__(self):
         super().__init__(id="preview")
         self.current_theme = "monokai"
-        self.repo: Optional[git.Repo] = None
-    async def update_preview(self, path: Optional[Path]) -> None:
+        self.repo: Optional["git.Repo"] = None
+        # Text files above this size are streamed through a windowed TextPreview.
+        self.stream_threshold = 1024 * 1024
+        # Streamed files above this size are shown as plain text, without syntax highlighting.
+        self.highlight_byte_cap = 64 * 1024 * 1024
+        # Archive members are previewed from their first bytes only, drawn as one panel.
+        self.member_preview_bytes = 256 * 1024
+        # Members further than this into a compressed tarball show metadata only; every preview
+        # of one would decompress the tarball from its start.
+        self.member_seek_bytes = 64 * 1024 * 1024
+        # Selection changes closer together than this only preview the last one.
+        self.debounce_delay = 0.08
+        self._generation = 0
+        self._debounce: Optional[Timer] = None
+        # Showing a preview awaits several mounts; a second show must not interleave with them.
+        self._show_lock = asyncio.Lock()
+        self.cache = PreviewCache(max_bytes=64 * 1024 * 1024)
+    @traced("preview.update")
+    def update_preview(self, path: Optional[Path], line: Optional[int] = None) -> None:
+        """Schedules a preview of `path`, opened at `line` (zero-based) if given.
+
+        Calls are debounced, and reading, sniffing and highlighting run in a worker thread;
+        a newer call cancels the pending one, so only the latest selection is rendered.
+        A preview that is fully cached is shown straight away.
+        """
+        self._generation += 1
+        if self._debounce is not None:
+            self._debounce.stop()
         self.repo = self.app.repo
-        if path is None:
-            await self.remove_children()
-            self.update(Panel("Select a file to see details.", border_style="dim"))
+        cached = self._cached_preview(path, self.current_theme) if path is not None and line is None else None
+        if cached is not None:
+            self.call_next(self._show_preview, self._generation, cached)
+            return
+        self._debounce = self.set_timer(self.debounce_delay, partial(self._start_preview, self._generation, path, line))
+    def _cache_keys(self, path: Path, theme: str) -> Optional[Tuple[tuple, tuple]]:
+        try:
+            st = path.stat()
+        except OSError:
+            # Archive members go stale with the archive they are read from.
+            location = split_archive_path(path)
+            try:
+                st = location[0].stat() if location is not None else None
+            except OSError:
+                st = None
+            if st is None:
+                return None
+        return (
+            ("info", path, st.st_mtime_ns, st.st_size, theme),
+            ("diff", path, st.st_mtime_ns, st.st_size, head_sha(self.repo)),
+        )
+    def _cached_preview(self, path: Path, theme: str) -> Optional[PreviewContent]:
+        """Assembles a preview from the cache alone; cheap enough for the event loop."""
+        keys = self._cache_keys(path, theme)
+        if keys is None:
+            return None
+        info = self.cache.get(keys[0])
+        if info is None:
+            return None
+        status, _ = get_file_git_status(path, self.repo)
+        diff = None
+        if status == "M":
+            diff = self.cache.get(keys[1])
+            if diff is None:
+                return None
+        return PreviewContent(path, status, info, diff, *self._git_history(path, status, info))
+    def _start_preview(self, generation: int, path: Optional[Path], line: Optional[int] = None) -> None:
+        self._build_preview(generation, path, self.current_theme, line)
+    @work(thread=True, exclusive=True, group="preview")
+    @traced("preview.build")
+    def _build_preview(self, generation: int, path: Optional[Path], theme: str, line: Optional[int] = None) -> None:
+        worker = get_current_worker()
+        content = None if path is None else self._render_preview(path, theme, line)
+        if worker.is_cancelled or generation != self._generation:
             return
+        self.app.call_from_thread(self._show_preview, generation, content)
+    @traced("preview.show")
+    async def _show_preview(self, generation: int, content: Optional[PreviewContent]) -> None:
+        async with self._show_lock:
+            if generation == self._generation:
+                await self._replace_preview(content)
+    async def _replace_preview(self, content: Optional[PreviewContent]) -> None:
         await self.remove_children()
+        if content is None:
+            self.update(Panel("Select a file to see details.", border_style="dim"))
+            return
+        self.update("")
+        tabs = TabbedContent(id="preview-tabs")
+        await self.mount(tabs)
+        info = content.info
+        if isinstance(info, StreamedText):
+            info_widget = TextPreview(info.path, info.theme, highlight=info.highlight, line=info.line, id="text-preview")
+        elif isinstance(info, DirectoryInfo):
+            info_widget = DirectorySummary(info, self.app.dir_sizer)
+        elif isinstance(info, BinaryInfo):
+            info_widget = BinaryPreview(info, id="binary-preview")
+        else:
+            info_widget = Static(info)
+        await tabs.add_pane(TabPane("Preview", info_widget, id="tab-preview"))
+        if content.diff is not None:
+            await tabs.add_pane(TabPane("Git Diff", self._diff_widget(content.diff), id="tab-diff"))
+        if content.history is not None:
+            await tabs.add_pane(TabPane("History", HistoryView(content.history, id="history-view"), id="tab-history"))
+        if content.blame is not None:
+            await tabs.add_pane(TabPane("Blame", BlameView(content.blame, id="blame-view"), id="tab-blame"))
+    def _render_preview(self, path: Path, theme: str, line: Optional[int] = None) -> PreviewContent:
+        """Runs on the preview worker thread; everything here may touch the disk or spawn git."""
         status, _ = get_file_git_status(path, self.repo)
-        with TabbedContent(id="preview-tabs") as tabs:
-            with TabPane("Preview", id="tab-preview"):
-                yield self._render_info_panel(path)
-            if status == "M":
-                with TabPane("Git Diff", id="tab-diff"):
-                    yield self._render_diff_panel(path)
-    def _render_info_panel(self, path: Path) -> Widget:
+        keys = self._cache_keys(path, theme)
+        if line is not None and keys and is_likely_text_file(path):
+            # Opened at a line: always windowed, so it can scroll there. Not cached; it is cheap.
+            info = StreamedText(path, theme, highlight=path.stat().st_size <= self.highlight_byte_cap, line=line)
+        else:
+            # The event loop has already counted these lookups as misses.
+            info = self.cache.get(keys[0], count=False) if keys else None
+        if info is None:
+            info = self._render_info_panel(path, theme)
+            if keys: self.cache.put(keys[0], info)
+        diff = None
+        if status == "M":
+            diff = self.cache.get(keys[1], count=False) if keys else None
+            if diff is None:
+                diff = self._render_diff_panel(path)
+                # A diff still being read lazily is not cached; it would keep its git process alive.
+                if keys and (not isinstance(diff, ParsedDiff) or diff.complete): self.cache.put(keys[1], diff)
+        return PreviewContent(path, status, info, diff, *self._git_history(path, status, info))
+    def _render_info_panel(self, path: Path, theme: str):
         try:
-            if path.is_dir(): return self._show_metadata(path, "Directory Info")
-            elif is_likely_text_file(path): return self._show_text_preview(path)
-            else: return self._show_metadata(path, "Binary File Info")
+            location = split_archive_path(path)
+            if location is not None and location[1]: return self._show_archive_member(*location, theme)
+            if path.is_dir(): return DirectoryInfo(path, get_file_metadata(path))
+            elif is_likely_text_file(path): return self._show_text_preview(path, theme)
+            else: return self._show_binary(path)
         except Exception as e: return Panel(Text(f"Error previewing file:\n{e}", style="bold red"), title="Error")
-    def _render_diff_panel(self, path: Path) -> Widget:
-        if not self.repo: return Static("Not in a Git repository.")
-        try:
-            rel_path = path.relative_to(self.repo.working_dir)
-            diff_text = self.repo.git.diff('HEAD', '--', str(rel_path))
-            return VerticalScroll(*[GitDiffLine(line) for line in diff_text.splitlines()], id="diff-view")
-        except Exception as e: return Static(f"Could not get diff: {e}")
-    def _show_metadata(self, path: Path, title: str):
-        metadata = get_file_metadata(path)
-        table = Table(box=None, expand=True, show_header=False)
-        table.add_column(style="bold cyan")
-        table.add_column()
-        for key, value in metadata.items(): table.add_row(key, value)
-        return Panel(table, title=title, border_style="blue")
-    def _show_text_preview(self, path: Path):
+    def _render_diff_panel(self, path: Path) -> Union[ParsedDiff, str]:
+        if not self.repo: return "Not in a Git repository."
+        try: return open_diff(self.repo, path)
+        except Exception as e: return f"Could not get diff: {e}"
+    def _git_history(self, path: Path, status: str, info) -> Tuple[Optional[FileHistory], Optional[FileBlame]]:
+        """The log and blame of `path` as of HEAD, cached per HEAD commit; both run git only once their tab is opened."""
+        head = head_sha(self.repo)
+        if head is None or status == "??" or in_archive(path):
+            return None, None
+        try: rel_path = path.relative_to(self.repo.working_dir).as_posix()
+        except ValueError: return None, None
+        is_dir = isinstance(info, DirectoryInfo)
+        history = self.cache.get(("history", path, head), count=False)
+        if history is None:
+            history = FileHistory(self.repo, rel_path, head, follow=not is_dir)
+            # Both start empty and fill as their tabs are read, so their cache entries are re-measured as they grow.
+            history.on_grow = partial(self.cache.resize, ("history", path, head))
+            self.cache.put(("history", path, head), history)
+        if is_dir:
+            return history, None
+        blame = self.cache.get(("blame", path, head), count=False)
+        if blame is None:
+            blame = FileBlame(self.repo, rel_path, head)
+            blame.on_grow = partial(self.cache.resize, ("blame", path, head))
+            self.cache.put(("blame", path, head), blame)
+        return history, blame
+    def _diff_widget(self, diff: Union[ParsedDiff, str]) -> Widget:
+        if isinstance(diff, str): return Static(diff)
+        return DiffView(diff, id="diff-view")
+    def _show_archive_member(self, archive: Path, member: str, theme: str):
+        """Decompresses no more of a member than the preview shows."""
+        import humanize
+
+        index = archive_cache.get(archive)
+        if index is None:
+            return Panel(f"Could not read {archive.name}", title="Error", border_style="red")
+        name = member.rpartition("/")[2]
+        if index.is_dir(member):
+            entries = index.listing(member)
+            size = humanize.naturalsize(sum(entry.size for entry in entries))
+            return metadata_panel({"Entries": str(len(entries)), "Size": size, "Archive": archive.name}, f"{name} (in archive)")
+        size, compressed = index.member_size(member)
+        cost = index.read_cost(member)
+        if cost > self.member_seek_bytes:
+            metadata = {
+                "Size": humanize.naturalsize(size), "Archive": archive.name,
+                "Preview": f"skipped; {humanize.naturalsize(cost)} of the compressed tarball precedes it",
+            }
+            return metadata_panel(metadata, f"{name} (in archive)")
+        head = index.read_member(member, self.member_preview_bytes)
+        if Path(name).suffix.lower() in TEXT_EXTENSIONS or looks_like_text(head):
+            title = name
+            if size > len(head):
+                head = head[:head.rfind(b"\n") + 1] or head
+                title = f"{name} (first {humanize.naturalsize(len(head))} of {humanize.naturalsize(size)})"
+            return Panel(highlight_text(head.decode("utf-8", errors="replace"), name, theme), title=title, border_style="green")
+        metadata = {"Size": humanize.naturalsize(size)}
+        if compressed is not None:
+            metadata["Compressed"] = humanize.naturalsize(compressed)
+        metadata["Archive"] = archive.name
+        return metadata_panel(metadata, "Binary File Info")
+    def _show_binary(self, path: Path) -> BinaryInfo:
+        with open(path, "rb") as f:
+            head = f.read(HEADER_BYTES)
+        return BinaryInfo(path, get_file_metadata(path), sniff_format(head))
+    def _show_text_preview(self, path: Path, theme: str):
         try:
+            size = path.stat().st_size
+            if size > self.stream_threshold:
+                return StreamedText(path, theme, highlight=size <= self.highlight_byte_cap)
             content = path.read_text(encoding="utf-8")
-            syntax = Syntax(content, path.name, theme=self.current_theme, line_numbers=True)
-            return Panel(syntax, title=path.name, border_style="green")
-        except Exception as e: return Panel(f"Error reading file: {e}", title="Error", border_style="red")
\ No newline at end of file
+            return Panel(highlight_text(content, path.name, theme), title=path.name, border_style="green")
+        except Exception as e: return Panel(f"Error reading file: {e}", title="Error", border_style="red")
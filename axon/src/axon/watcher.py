@@ -0,0 +1,210 @@
+# watcher.py
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from listing import directory_mtime_ns
+
+# {directory: names that changed inside it, or None when the whole directory must be rescanned}
+FsChanges = Dict[Path, Optional[Set[str]]]
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class FsWatcher:
+    """Watches the directories on screen and reports coalesced changes from a background thread.
+
+    Events are gathered until the filesystem has been quiet for `quiet_period` seconds (or
+    `max_delay` has passed), so a burst such as a `git checkout` reaches `on_changes` as a
+    single batch. Uses inotify on Linux and falls back to polling directory mtimes elsewhere.
+    """
+
+    def __init__(
+        self,
+        on_changes: Callable[[FsChanges], None],
+        quiet_period: float = 0.1,
+        max_delay: float = 1.0,
+        poll_interval: float = 1.0,
+    ):
+        self.on_changes = on_changes
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._directories: Set[Path] = set()
+        self._pending: FsChanges = {}
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = _Inotify.create()
+        self._poll_mtimes: Dict[Path, Optional[int]] = {}
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="axon-fs-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self._inotify:
+            self._inotify.close()
+
+    def watch(self, directories: Iterable[Path]) -> None:
+        """Replaces the set of watched directories."""
+        directories = set(directories)
+        with self._lock:
+            for directory in self._directories - directories:
+                if self._inotify:
+                    self._inotify.remove(directory)
+                self._poll_mtimes.pop(directory, None)
+            for directory in directories - self._directories:
+                if self._inotify:
+                    self._inotify.add(directory)
+                self._poll_mtimes[directory] = directory_mtime_ns(directory)
+            self._directories = directories
+
+    def notify_changed(self, directory: Path, names: Optional[Iterable[str]] = None) -> None:
+        """Queues a change made by Axon itself, so it goes through the same patch pipeline."""
+        with self._lock:
+            self._record(directory, None if names is None else set(names))
+
+    def _record(self, directory: Path, names: Optional[Set[str]]) -> None:
+        now = time.monotonic()
+        if not self._pending:
+            self._first_event = now
+        self._last_event = now
+        if names is None or directory in self._pending and self._pending[directory] is None:
+            self._pending[directory] = None
+        else:
+            self._pending.setdefault(directory, set()).update(names)
+
+    def _run(self) -> None:
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stopped.is_set():
+            if self._inotify:
+                data = self._inotify.wait(timeout=self.quiet_period)
+                with self._lock:
+                    for directory, name in self._inotify.parse(data):
+                        self._record(directory, None if name is None else {name})
+            else:
+                self._stopped.wait(self.quiet_period)
+                if time.monotonic() >= next_poll:
+                    self._poll()
+                    next_poll = time.monotonic() + self.poll_interval
+            self._flush_if_settled()
+
+    def _poll(self) -> None:
+        with self._lock:
+            for directory, previous in list(self._poll_mtimes.items()):
+                current = directory_mtime_ns(directory)
+                if current != previous:
+                    self._poll_mtimes[directory] = current
+                    self._record(directory, None)
+
+    def _flush_if_settled(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            now = time.monotonic()
+            if now - self._last_event < self.quiet_period and now - self._first_event < self.max_delay:
+                return
+            changes, self._pending = self._pending, {}
+        self.on_changes(changes)
+
+
+class _Inotify:
+    """A minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self._fd = fd
+        self._paths: Dict[int, Path] = {}
+        self._descriptors: Dict[Path, int] = {}
+
+    @classmethod
+    def create(cls) -> Optional["_Inotify"]:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def add(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._paths[wd] = directory
+            self._descriptors[directory] = wd
+
+    def remove(self, directory: Path) -> None:
+        wd = self._descriptors.pop(directory, None)
+        if wd is not None:
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def wait(self, timeout: float) -> bytes:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return b""
+        try:
+            return os.read(self._fd, 256 * 1024)
+        except BlockingIOError:
+            return b""
+
+    def parse(self, data: bytes):
+        """Returns (directory, name) pairs; a name of None means the directory needs a rescan."""
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.extend((directory, None) for directory in self._descriptors)
+                continue
+            if mask & IN_IGNORED:
+                directory = self._paths.pop(wd, None)
+                if directory is not None:
+                    self._descriptors.pop(directory, None)
+                continue
+            directory = self._paths.get(wd)
+            if directory is not None and name:
+                events.append((directory, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self._fd)
+
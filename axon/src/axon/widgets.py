@@ -1,33 +1,619 @@
 # widgets.py
 
+import mmap
+import os
+from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 
+from rich.console import Group
 from rich.text import Text
-from textual.widget import Widget
-from textual.widgets import Static, Label, ListItem
+from textual import work
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Vertical
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
+from textual.widgets import Static
+from textual.worker import get_current_worker
 
-from utils import make_file_display, GIT_STATUS_ICONS
+from dirsize import DirSizer, DirSizeScan
+from fileops import FileOperations
+from preview import BinaryInfo, DirectoryInfo, LineIndex, metadata_panel
+from utils import GIT_STATUS_ICONS
+from vcs import FileBlame, FileHistory, ParsedDiff
 
-class DirectoryItem(ListItem):
-    """A ListItem that displays a file or directory."""
+class DiffView(ScrollView, can_focus=True):
+    """A git diff drawn by a single widget.
 
-    def __init__(self, path: Path, repo):
-        super().__init__(Label(make_file_display(path, repo)))
-        self.path = path
+    Only the visible lines are rendered, and more of the diff is read from git whenever
+    the view scrolls near the end of what has been parsed so far.
+    """
+
+    BINDINGS = [
+        Binding("up,k", "scroll_up", "Up", show=False),
+        Binding("down,j", "scroll_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home,g", "scroll_home", "Top", show=False),
+        Binding("end,G", "scroll_end", "Bottom", show=False),
+        Binding("n,right_square_bracket", "next_hunk", "Next Hunk"),
+        Binding("p,left_square_bracket", "previous_hunk", "Previous Hunk"),
+    ]
+
+    # Start reading the next chunk once the view is this close to the end of the parsed lines.
+    LOAD_AHEAD = 200
+
+    STYLES = {
+        ParsedDiff.HEADER: "bold dim",
+        ParsedDiff.HUNK: "cyan",
+        ParsedDiff.ADD: "green",
+        ParsedDiff.REMOVE: "red",
+        ParsedDiff.CONTEXT: "dim",
+    }
+
+    def __init__(self, diff: ParsedDiff, **kwargs):
+        super().__init__(**kwargs)
+        self.diff = diff
+        self._loading = False
+        self._jump_after_load: Optional[str] = None
+
+    def on_mount(self) -> None:
+        self._loaded()
+
+    def on_unmount(self) -> None:
+        if not self.diff.complete:
+            self.diff.close()
+
+    def _load_more(self) -> None:
+        if not self._loading and not self.diff.complete:
+            self._loading = True
+            self._load_chunk()
+
+    @work(thread=True, exclusive=True, group="diff-load")
+    def _load_chunk(self) -> None:
+        self.diff.load_chunk()
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._loaded)
+
+    def _loaded(self) -> None:
+        self._loading = False
+        self.virtual_size = Size(0, self.diff.line_count)
+        self.border_subtitle = "" if self.diff.complete else f"{self.diff.line_count} lines loaded…"
+        if self._jump_after_load is not None:
+            action, self._jump_after_load = self._jump_after_load, None
+            getattr(self, f"action_{action}")()
+        self.refresh()
+
+    def action_next_hunk(self) -> None:
+        line_no = self.diff.next_hunk(self.scroll_offset.y)
+        if line_no is not None:
+            self.scroll_to(y=line_no, animate=False)
+        elif not self.diff.complete:
+            self._jump_after_load = "next_hunk"
+            self._load_more()
+
+    def action_previous_hunk(self) -> None:
+        line_no = self.diff.previous_hunk(self.scroll_offset.y)
+        if line_no is not None:
+            self.scroll_to(y=line_no, animate=False)
+
+    def render_line(self, y: int) -> Strip:
+        line_no = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        if line_no + self.LOAD_AHEAD >= self.diff.line_count:
+            self._load_more()
+        if line_no >= self.diff.line_count:
+            return Strip.blank(width, self.rich_style)
+        line, kind = self.diff.lines[line_no], self.diff.kinds[line_no]
+        if kind == ParsedDiff.ADD:
+            text = Text.assemble(GIT_STATUS_ICONS["GIT_DIFF_ADD"], " ", line[1:], style="green")
+        elif kind == ParsedDiff.REMOVE:
+            text = Text.assemble(GIT_STATUS_ICONS["GIT_DIFF_REMOVE"], " ", line[1:], style="red")
+        elif kind == ParsedDiff.CONTEXT:
+            text = Text(f"  {line}", style="dim")
+        else:
+            text = Text(line, style=self.STYLES[kind])
+        text.expand_tabs()
+        text.no_wrap = True
+        return Strip(text.render(self.app.console)).crop_extend(0, width, self.rich_style)
+
+def _commit_date(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+class HistoryView(ScrollView, can_focus=True):
+    """The commits that touched a path, one per line, read from `git log` a page at a time.
+
+    Nothing is read until the view is first drawn, so the History tab costs no git process
+    until it is opened, and further pages are read as the view nears the last one loaded.
+    """
+
+    BINDINGS = [
+        Binding("up,k", "scroll_up", "Up", show=False),
+        Binding("down,j", "scroll_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home,g", "scroll_home", "Top", show=False),
+        Binding("end,G", "scroll_end", "Bottom", show=False),
+    ]
+
+    # Read the next page once the view is this close to the last commit loaded.
+    LOAD_AHEAD = 100
+
+    def __init__(self, history: FileHistory, **kwargs):
+        super().__init__(**kwargs)
+        self.history = history
+        self._loading = False
+
+    def on_mount(self) -> None:
+        self._loaded()
+
+    def on_unmount(self) -> None:
+        # The history stays cached with the commits read so far; git is restarted if it is reopened.
+        self.history.close()
+
+    def _load_more(self) -> None:
+        if not self._loading and not self.history.complete:
+            self._loading = True
+            self._load_page()
 
-class GitDiffLine(Widget):
-    """A widget to display a single line of a git diff."""
-    
-    def __init__(self, line: str):
-        super().__init__()
-        self.line = line
-
-    def render(self) -> Text:
-        if self.line.startswith('+'):
-            return Text.assemble(GIT_STATUS_ICONS["GIT_DIFF_ADD"], " ", self.line[1:], style="green")
-        elif self.line.startswith('-'):
-            return Text.assemble(GIT_STATUS_ICONS["GIT_DIFF_REMOVE"], " ", self.line[1:], style="red")
-        elif self.line.startswith('@@'):
-            return Text(self.line, style="cyan")
+    @work(thread=True, exclusive=True, group="history-load")
+    def _load_page(self) -> None:
+        self.history.load_page()
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._loaded)
+
+    def _loaded(self) -> None:
+        self._loading = False
+        count = len(self.history.commits)
+        self.virtual_size = Size(0, count)
+        self.border_subtitle = f"{count} commits" + ("" if self.history.complete else " loaded…")
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        line_no = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        commits = self.history.commits
+        if line_no + self.LOAD_AHEAD >= len(commits):
+            self._load_more()
+        if line_no >= len(commits):
+            if line_no == 0:
+                message = self.history.error or ("No commits touch this path." if self.history.complete else "Loading…")
+                return Strip(Text(message, style="dim").render(self.app.console)).crop_extend(0, width, self.rich_style)
+            return Strip.blank(width, self.rich_style)
+        commit = commits[line_no]
+        text = Text.assemble(
+            (commit.sha[:8], "yellow"), " ", (_commit_date(commit.time), "dim"), " ",
+            (f"{commit.author[:12]:<12}", "cyan"), " ", commit.summary, no_wrap=True,
+        )
+        return Strip(text.render(self.app.console)).crop_extend(0, width, self.rich_style)
+
+class BlameView(ScrollView, can_focus=True):
+    """A file as of HEAD with the commit behind each line.
+
+    The lines are read when the view is first drawn; blame is then run only for the blocks
+    of lines on screen (and a screen either side), so a long file is never blamed whole.
+    """
+
+    BINDINGS = [
+        Binding("up,k", "scroll_up", "Up", show=False),
+        Binding("down,j", "scroll_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home,g", "scroll_home", "Top", show=False),
+        Binding("end,G", "scroll_end", "Bottom", show=False),
+    ]
+
+    def __init__(self, blame: FileBlame, **kwargs):
+        super().__init__(**kwargs)
+        self.blame = blame
+        self._loading = False
+
+    def on_mount(self) -> None:
+        self._show_lines()
+
+    def _wanted(self) -> range:
+        top, height = self.scroll_offset.y, self.size.height
+        return range(max(0, top - height), top + 2 * height)
+
+    def _load_visible(self) -> None:
+        if self._loading or self.blame.error:
+            return
+        wanted = self._wanted()
+        if self.blame.lines is None or self.blame.missing_blocks(wanted.start, wanted.stop):
+            self._loading = True
+            self._blame_range(wanted.start, wanted.stop)
+
+    @work(thread=True, exclusive=True, group="blame-load")
+    def _blame_range(self, start: int, end: int) -> None:
+        if self.blame.lines is None:
+            self.blame.load_lines()
+            # The text can be shown while its blame is worked out.
+            self.app.call_from_thread(self._show_lines)
+        self.blame.load_range(start, end)
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._loaded)
+
+    def _show_lines(self) -> None:
+        self.virtual_size = Size(0, self.blame.line_count)
+        self.border_subtitle = self.blame.error
+        self.refresh()
+
+    def _loaded(self) -> None:
+        self._loading = False
+        self._show_lines()
+
+    def render_line(self, y: int) -> Strip:
+        line_no = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        self._load_visible()
+        blame = self.blame
+        if line_no >= blame.line_count:
+            if line_no == 0 and (blame.error or blame.lines is None):
+                text = Text(blame.error or "Loading…", style="dim")
+                return Strip(text.render(self.app.console)).crop_extend(0, width, self.rich_style)
+            return Strip.blank(width, self.rich_style)
+        index = blame.line_commits[line_no]
+        gutter_width = len(str(blame.line_count))
+        if index < 0:
+            gutter = Text(f"{'…':<8} {'':<10} {'':<12} ", style="dim")
         else:
-            return Text(f"  {self.line}", style="dim")
\ No newline at end of file
+            commit = blame.commits[index]
+            # A commit's details are shown once per run of its lines.
+            repeat = line_no > 0 and blame.line_commits[line_no - 1] == index and y > 0
+            gutter = Text.assemble(
+                (commit.sha[:8], "dim" if repeat else "yellow"), " ",
+                (f"{'' if repeat else _commit_date(commit.time):<10}", "dim"), " ",
+                (f"{'' if repeat else commit.author[:12]:<12}", "cyan"), " ",
+            )
+        text = Text.assemble(gutter, (f"{line_no + 1:>{gutter_width}} ", "dim"), blame.lines[line_no], no_wrap=True)
+        text.expand_tabs()
+        return Strip(text.render(self.app.console)).crop_extend(0, width, self.rich_style)
+
+class TextPreview(ScrollView, can_focus=True):
+    """A windowed view of a large text file.
+
+    The file is memory-mapped and indexed by a background worker; only the visible lines
+    plus a margin are decoded and highlighted, and more are loaded as the view scrolls.
+    """
+
+    BINDINGS = [
+        Binding("up,k", "scroll_up", "Up", show=False),
+        Binding("down,j", "scroll_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home,g", "scroll_home", "Top", show=False),
+        Binding("end,G", "scroll_end", "Bottom", show=False),
+    ]
+
+    # Lines highlighted above and below the visible window.
+    MARGIN = 100
+
+    def __init__(self, path: Path, theme: str, highlight: bool = True, line: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        # A line to bring into view and mark, such as a search match; zero-based.
+        self.target_line = line
+        self._scroll_pending = line is not None
+        from rich.syntax import Syntax  # Pulls in pygments, which only text previews need.
+
+        self.line_index = LineIndex(path)
+        self.syntax: Optional["Syntax"] = None
+        if highlight:
+            self.syntax = Syntax("", Syntax.guess_lexer(path.name), theme=theme)
+        self.background_style = Syntax.get_theme(theme).get_background_style()
+        self._window_start = 0
+        self._window: List[Text] = []
+        self._window_partial = False
+        self.border_title = path.name
+
+    def on_mount(self) -> None:
+        self._build_index()
+
+    def on_unmount(self) -> None:
+        self.line_index.close()
+
+    @work(thread=True, exclusive=True, group="line-index")
+    def _build_index(self) -> None:
+        worker = get_current_worker()
+        while not worker.is_cancelled:
+            complete = self.line_index.index_chunk()
+            self.app.call_from_thread(self._index_progress)
+            if complete:
+                return
+
+    def _index_progress(self) -> None:
+        self.virtual_size = Size(0, self.line_index.estimated_line_count)
+        self.border_subtitle = "" if self.line_index.complete else f"indexing {self.line_index.progress:.0%}"
+        if self._window_partial:
+            # Lines that were pending on the index may be on screen now.
+            self._window = []
+        if self._scroll_pending and (self.line_index.complete or self.line_index.line_count > self.target_line):
+            # The target line has been indexed, so the view is tall enough to scroll to it.
+            self._scroll_pending = False
+            self.call_after_refresh(self._scroll_to_target)
+        self.refresh()
+
+    def _scroll_to_target(self) -> None:
+        self.scroll_to_line(max(0, self.target_line - self.size.height // 3))
+
+    def scroll_to_line(self, line_no: int) -> None:
+        """Scrolls so that `line_no` (zero-based) is at the top of the view."""
+        self.scroll_to(y=line_no, animate=False)
+
+    def _line(self, line_no: int) -> Optional[Text]:
+        window_end = self._window_start + len(self._window)
+        if not self._window_start <= line_no < window_end:
+            start = max(0, line_no - self.MARGIN)
+            count = self.size.height + 2 * self.MARGIN
+            lines = self.line_index.lines(start, count)
+            # Stop at the first line that is not indexed yet; it is loaded on the next progress update.
+            self._window_partial = None in lines
+            if self._window_partial:
+                lines = lines[:lines.index(None)]
+            self._window_start = start
+            self._window = self._highlight(lines)
+            if not self._window_start <= line_no < self._window_start + len(self._window):
+                return None
+        return self._window[line_no - self._window_start]
+
+    def _highlight(self, lines: List[str]) -> List[Text]:
+        if self.syntax is None:
+            return [Text(line) for line in lines]
+        # Highlighting starts mid-file, so a token that spans the window edge can be mis-coloured.
+        highlighted = self.syntax.highlight("\n".join(lines))
+        highlighted.rstrip()
+        result = highlighted.split("\n", allow_blank=True)
+        return list(result)[:len(lines)] + [Text(line) for line in lines[len(result):]]
+
+    def render_line(self, y: int) -> Strip:
+        line_no = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        text = self._line(line_no)
+        if text is None:
+            return Strip.blank(width, self.background_style)
+        gutter_width = len(str(self.line_index.estimated_line_count))
+        display = Text.assemble((f"{line_no + 1:>{gutter_width}} ", "dim"), text, style=self.background_style)
+        if line_no == self.target_line:
+            display.stylize("on #44475a")
+        display.expand_tabs()
+        display.no_wrap = True
+        return Strip(display.render(self.app.console)).crop_extend(0, width, self.background_style)
+
+def _byte_style(byte: int) -> str:
+    if byte == 0:
+        return "dim"
+    if 0x20 < byte < 0x7F:
+        return "cyan"
+    if chr(byte).isspace():
+        return "green"
+    return "yellow"
+
+
+# Style and ASCII column character of every byte value, worked out once.
+BYTE_STYLES = [_byte_style(byte) for byte in range(256)]
+BYTE_CHARS = [chr(byte) if 0x20 <= byte < 0x7F else "." for byte in range(256)]
+
+
+class HexView(ScrollView, can_focus=True):
+    """A hex and ASCII dump of a memory-mapped file.
+
+    Rows are formatted only when drawn, straight from the mapping, so memory use stays flat
+    however large the file is, and any offset is one slice away.
+    """
+
+    BINDINGS = [
+        Binding("up,k", "scroll_up", "Up", show=False),
+        Binding("down,j", "scroll_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home,g", "scroll_home", "Top", show=False),
+        Binding("end,G", "scroll_end", "Bottom", show=False),
+        Binding("o", "go_to_offset", "Go to Offset"),
+    ]
+
+    # Bytes per row, widest first; the widest that fits the view is used.
+    ROW_WIDTHS = (16, 8, 4)
+
+    def __init__(self, path: Path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.bytes_per_row = self.ROW_WIDTHS[0]
+        self.file_size = 0
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._offset_digits = 8
+        self.border_title = path.name
+
+    def on_mount(self) -> None:
+        try:
+            self._file = open(self.path, "rb")
+            self.file_size = os.fstat(self._file.fileno()).st_size
+            if self.file_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            self.file_size = 0
+            self.border_subtitle = f"cannot map: {e}"
+        self._offset_digits = max(8, len(f"{self.file_size:x}"))
+        self._fit_rows()
+
+    def on_resize(self) -> None:
+        self._fit_rows()
+
+    def _fit_rows(self) -> None:
+        """Picks the widest row that fits, keeping the byte at the top of the view in place."""
+        width = self.scrollable_content_region.width
+        # Offset, hex cells, the gap between their halves, then the ASCII column.
+        fits = [n for n in self.ROW_WIDTHS if self._offset_digits + 2 + n * 3 + 2 + n <= width]
+        bytes_per_row = fits[0] if fits else self.ROW_WIDTHS[-1]
+        top = self.scroll_offset.y * self.bytes_per_row
+        self.bytes_per_row = bytes_per_row
+        self.virtual_size = Size(0, -(-self.file_size // bytes_per_row))
+        self.seek(top)
+
+    def on_unmount(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+
+    def _check_size(self) -> int:
+        """The file's size, shrunk if it was truncated since it was mapped.
+
+        Touching a mapped page past the end of the file kills the process with SIGBUS, so every
+        row is read only after this check. The watcher's change then rebuilds the preview.
+        """
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+        except (OSError, ValueError):
+            size = 0
+        if size < self.file_size:
+            self.file_size = size
+            self.call_later(self._fit_rows)
+        return self.file_size
+
+    def seek(self, offset: int) -> None:
+        """Scrolls the row holding `offset` to the top of the view."""
+        offset = max(0, min(offset, self.file_size - 1))
+        self.scroll_to(y=offset // self.bytes_per_row, animate=False)
+
+    def action_go_to_offset(self) -> None:
+        from screens import InputScreen
+
+        def on_submit(value: str):
+            value = value.strip()
+            if not value:
+                return
+            try:
+                offset = int(float(value[:-1]) / 100 * self.file_size) if value.endswith("%") else int(value, 0)
+            except ValueError:
+                self.notify(f"Not an offset: {value}", severity="error")
+                return
+            self.seek(offset)
+
+        self.app.push_screen(InputScreen("Go to offset (decimal, 0x… hex, or a percentage):"), on_submit)
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        offset = (self.scroll_offset.y + y) * self.bytes_per_row
+        if self._mmap is None or offset >= self._check_size():
+            return Strip.blank(width, self.rich_style)
+        row = self._mmap[offset:min(offset + self.bytes_per_row, self.file_size)]
+        text = Text(f"{offset:0{self._offset_digits}x}  ", style="dim", no_wrap=True)
+        for column in range(self.bytes_per_row):
+            if column == self.bytes_per_row // 2:
+                text.append(" ")
+            if column < len(row):
+                text.append(f"{row[column]:02x} ", style=BYTE_STYLES[row[column]])
+            else:
+                text.append("   ")
+        text.append(" ")
+        for byte in row:
+            text.append(BYTE_CHARS[byte], style=BYTE_STYLES[byte])
+        return Strip(text.render(self.app.console)).crop_extend(0, width, self.rich_style)
+
+
+class BinaryPreview(Vertical):
+    """A binary file's metadata and header summary above a hex view of its contents."""
+
+    def __init__(self, info: BinaryInfo, **kwargs):
+        super().__init__(**kwargs)
+        self.info = info
+
+    def compose(self) -> ComposeResult:
+        panels = [metadata_panel(self.info.metadata, "Binary File Info")]
+        if self.info.file_format is not None:
+            name, fields = self.info.file_format
+            panels.append(metadata_panel(fields, name) if fields else Text(f" {name}", style="bold"))
+        yield Static(Group(*panels), id="binary-summary")
+        yield HexView(self.info.path, id="hex-view")
+
+
+class JobsBar(Static):
+    """Progress of the running file operations, one line per job; hidden while there are none."""
+
+    def __init__(self, operations: FileOperations, **kwargs):
+        super().__init__(**kwargs)
+        self.operations = operations
+        self.display = False
+
+    def on_mount(self) -> None:
+        self._timer = self.set_interval(0.2, self._refresh_jobs, pause=True)
+
+    def track(self) -> None:
+        """Starts polling the jobs; called whenever one is submitted."""
+        self._refresh_jobs()
+        self._timer.resume()
+
+    def _refresh_jobs(self) -> None:
+        jobs = list(self.operations.jobs)
+        if not jobs:
+            self.display = False
+            self._timer.pause()
+            return
+        import humanize
+
+        text = Text()
+        for job in jobs:
+            if text:
+                text.append("\n")
+            text.append(job.description, style="bold")
+            if job.cancelled:
+                text.append("  cancelling…", style="yellow")
+            elif job.planning:
+                text.append("  scanning…", style="dim")
+            else:
+                text.append(
+                    f"  {job.files_done}/{job.files_total} files, "
+                    f"{humanize.naturalsize(job.bytes_done)}/{humanize.naturalsize(job.bytes_total)}"
+                )
+            if job.errors:
+                text.append(f"  {len(job.errors)} errors", style="red")
+        text.append("  (esc to cancel)", style="dim")
+        self.update(text)
+        self.display = True
+
+class DirectorySummary(Static):
+    """A directory's metadata panel; `measure` fills in its recursive size as the walk progresses."""
+
+    def __init__(self, info: DirectoryInfo, sizer: DirSizer, **kwargs):
+        super().__init__(**kwargs)
+        self.info = info
+        self.sizer = sizer
+        self.scan: Optional[DirSizeScan] = None
+        self._timer: Optional[Timer] = None
+
+    def on_mount(self) -> None:
+        self._show_totals()
+
+    def on_unmount(self) -> None:
+        if self.scan is not None and not self.scan.done:
+            self.scan.cancel()
+
+    def measure(self) -> None:
+        """Starts the recursive walk; it runs only when asked for, as a whole tree can be huge."""
+        if self.scan is None:
+            self.scan = self.sizer.scan(self.info.path)
+            self._timer = self.set_interval(0.2, self._show_totals)
+            self._show_totals()
+
+    def _show_totals(self) -> None:
+        import humanize
+
+        scan = self.scan
+        if scan is None:
+            metadata = dict(self.info.metadata, Size=Text("press z to measure", style="dim"))
+            self.update(metadata_panel(metadata, "Directory Info"))
+            return
+        if scan.done:
+            self._timer.stop()
+        size = Text(humanize.naturalsize(scan.size), style="bold")
+        size.append(f"  {scan.files:,} files, {scan.dirs:,} folders", style="dim")
+        if not scan.done:
+            size.append("  measuring…", style="yellow")
+        elif scan.errors:
+            size.append(f"  {scan.errors:,} unreadable", style="red")
+        metadata = dict(self.info.metadata, Size=size)
+        self.update(metadata_panel(metadata, "Directory Info"))